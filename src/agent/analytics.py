@@ -1,18 +1,75 @@
 from __future__ import annotations
 
+import re
+from bisect import bisect_left, bisect_right
 from dataclasses import asdict
 from datetime import datetime, timezone
-from statistics import median
-from typing import Any, Dict, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from .categories import categorize, categories_version
-from .models import CreditTransaction, QuestionnaireAnswers, Transaction
-
-
-def _to_df(transactions: List[Transaction]) -> pd.DataFrame:
-    rows = []
+from .models import CreditTransaction, QuestionnaireAnswers, StatementSummary, Transaction
+
+# Helpers slice the shared frame and add scratch columns; with Copy-on-Write
+# those slices are lazy views and only mutated columns get copied.
+pd.options.mode.copy_on_write = True
+
+# Keywords for credit/loan/installment detection
+_CREDIT_KEYWORDS = [
+    r"\bкредит\b", r"\bcredit\b", r"\bloan\b", r"\bзайм\b",
+    r"\bkaspi\s*кредит\b", r"\bkaspi\s*red\b", r"\bрассрочк", r"\binstallment\b",
+    r"\bоплат[аы]\s*kaspi\s*кредит", r"\bпогашен", r"\brepayment\b",
+    r"\bкредит\s*для\s*ип\b", r"\bкредит\s*наличными\b",
+]
+_CREDIT_PATTERN = re.compile("|".join(_CREDIT_KEYWORDS), re.IGNORECASE)
+
+# Read-only results for accounts without (credit) debits; callers get a shallow copy
+_EMPTY_CREDITS = MappingProxyType({
+    "total_monthly": 0.0,
+    "percentage_of_expenses": 0.0,
+    "recurring_payments": (),
+    "credit_transactions": (),
+    "warning_level": "low",
+})
+_EMPTY_LEAKS = MappingProxyType({
+    "total_monthly": 0.0,
+    "leak_sources": (),
+    "insight": "",
+})
+
+_WARNING_THRESHOLDS = (25, 40)
+_WARNING_LEVELS = ("low", "medium", "high")
+
+_BASE_COLUMNS = ["date", "description", "amount", "balance"]
+_DERIVED_COLUMNS = ["category", "income", "spend", "is_debit", "month", "week", "day"]
+# Accepted date range, as [start, end): years 2000-2100
+_MIN_DATE = np.datetime64("2000-01-01")
+_MAX_DATE = np.datetime64("2101-01-01")
+
+
+def _to_df(transactions: Union[List[Transaction], StatementSummary]) -> pd.DataFrame:
+    if isinstance(transactions, StatementSummary):
+        # The summary already holds the columns: only the date filter remains
+        dates = transactions.dates
+        descs = transactions.descriptions
+        amts = transactions.amounts
+        bals = transactions.balances
+        keep = (dates >= _MIN_DATE) & (dates < _MAX_DATE)  # NaT compares False
+        if not keep.all():
+            dates, descs, amts, bals = dates[keep], descs[keep], amts[keep], bals[keep]
+        return _frame(dates, descs, amts, bals)
+
+    # Fill preallocated typed column arrays in one pass; pandas adopts them as
+    # columns without per-row dicts or a second coercion pass.
+    size = len(transactions)
+    dates = np.empty(size, dtype="datetime64[ns]")
+    descs = np.empty(size, dtype=object)
+    amts = np.empty(size, dtype=np.float64)
+    bals = np.full(size, np.nan)  # NaN marks a missing balance
+    n = 0
     for t in transactions:
         # Skip transactions with invalid dates (shouldn't happen, but safety check)
         if t.date is None:
@@ -20,254 +77,237 @@ def _to_df(transactions: List[Transaction]) -> pd.DataFrame:
         # Double-check date is reasonable (2000-2100)
         if t.date.year < 2000 or t.date.year > 2100:
             continue
-        rows.append(
-            {
-                "date": t.date,
-                "description": t.description,
-                "amount": float(t.amount),
-                "balance": None if t.balance is None else float(t.balance),
-            }
-        )
-    if not rows:
-        return pd.DataFrame(columns=["date", "description", "amount", "balance"])
-    df = pd.DataFrame(rows)
-    # Use errors='coerce' to handle any edge cases gracefully
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    # Drop rows where date conversion failed
-    df = df.dropna(subset=["date"])
-    df = df.sort_values("date").reset_index(drop=True)
+        dates[n] = t.date
+        descs[n] = t.description
+        amts[n] = t.amount
+        if t.balance is not None:
+            bals[n] = t.balance
+        n += 1
+    return _frame(dates[:n], descs[:n], amts[:n], bals[:n])
+
+
+def _frame(
+    dates: np.ndarray,
+    descs: np.ndarray,
+    amts: np.ndarray,
+    bals: np.ndarray,
+) -> pd.DataFrame:
+    """Sorted, enriched frame from validated column arrays."""
+    if not len(dates):
+        return pd.DataFrame(columns=_BASE_COLUMNS + _DERIVED_COLUMNS)
+    df = pd.DataFrame(
+        {
+            "date": dates,
+            # Merchants repeat heavily: integer codes make groupby/isin cheap
+            "description": pd.Categorical(descs),
+            "amount": amts,
+            "balance": bals,
+        },
+        copy=False,
+    )
+    # Stable, so same-day rows keep statement order (the output list relies on it)
+    df = df.sort_values("date", kind="stable").reset_index(drop=True)
+    return _enrich(df)
+
+
+def _enrich(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the derived columns shared by every analytics helper, in one pass."""
+    # Categorize each distinct description once, then broadcast through the codes
+    descriptions = df["description"].cat
+    labels = np.array([categorize(d) for d in descriptions.categories], dtype=object)
+    df["category"] = pd.Categorical(labels[descriptions.codes.to_numpy()])
+    amt = df["amount"].to_numpy()
+    income = np.maximum(amt, 0.0)
+    df["income"] = income
+    # income - amt is -amt on debits and 0 elsewhere, without a negated temporary
+    df["spend"] = income - amt
+    df["is_debit"] = amt < 0
+    # Period keys group on integer ordinals; they are stringified only on output
+    df["month"] = df["date"].dt.to_period("M")
+    df["week"] = df["date"].dt.to_period("W-MON")  # week starting Monday
+    df["day"] = df["date"].dt.normalize()
     return df
 
 
-def _weekly_monthly_summaries(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    if df.empty:
-        return [], []
+def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rows of an aggregated frame as dicts, zipped from whole-column Python lists."""
+    cols = list(frame.columns)
+    return [dict(zip(cols, row)) for row in zip(*(frame[c].tolist() for c in cols))]
 
-    d = df.copy()
-    d["week"] = d["date"].dt.to_period("W-MON").astype(str)  # week starting Monday
-    d["month"] = d["date"].dt.to_period("M").astype(str)
-    d["income"] = d["amount"].clip(lower=0.0)
-    d["spend"] = (-d["amount"]).clip(lower=0.0)
 
-    weekly = (
-        d.groupby("week", as_index=False)
-        .agg(
-            income=("income", "sum"),
-            spending=("spend", "sum"),
-            net=("amount", "sum"),
-            transactions=("amount", "count"),
-        )
-        .sort_values("week")
-        .to_dict(orient="records")
+def _period_summary(df: pd.DataFrame, period: str) -> List[Dict[str, Any]]:
+    # groupby's default key sort already yields chronological order
+    out = df.groupby(period, as_index=False, observed=True).agg(
+        income=("income", "sum"),
+        spending=("spend", "sum"),
+        net=("amount", "sum"),
+        transactions=("amount", "count"),
     )
+    out[period] = out[period].astype(str)
+    return _records(out)
 
-    monthly = (
-        d.groupby("month", as_index=False)
-        .agg(
-            income=("income", "sum"),
-            spending=("spend", "sum"),
-            net=("amount", "sum"),
-            transactions=("amount", "count"),
-        )
-        .sort_values("month")
-        .to_dict(orient="records")
-    )
-    return weekly, monthly
+
+def _weekly_monthly_summaries(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    if df.empty:
+        return [], []
+    return _period_summary(df, "week"), _period_summary(df, "month")
 
 
 def _category_breakdown(df: pd.DataFrame) -> List[Dict[str, Any]]:
     if df.empty:
         return []
-    d = df.copy()
-    d["category"] = d["description"].apply(categorize)
-    d["income"] = d["amount"].clip(lower=0.0)
-    d["spend"] = (-d["amount"]).clip(lower=0.0)
     out = (
-        d.groupby("category", as_index=False)
+        df.groupby("category", as_index=False, sort=False, observed=True)
         .agg(
             income=("income", "sum"),
             spending=("spend", "sum"),
             transactions=("amount", "count"),
         )
         .sort_values(["spending", "income"], ascending=[False, False])
-        .to_dict(orient="records")
     )
-    return out
+    return _records(out)
 
 
 def _trends(df: pd.DataFrame) -> Dict[str, Any]:
     if df.empty:
         return {"daily_net": []}
-    d = df.copy()
-    d["day"] = d["date"].dt.date.astype(str)
-    daily = (
-        d.groupby("day", as_index=False)
-        .agg(net=("amount", "sum"), transactions=("amount", "count"))
-        .sort_values("day")
-        .to_dict(orient="records")
+    out = df.groupby("day", as_index=False, observed=True).agg(
+        net=("amount", "sum"),
+        transactions=("amount", "count"),
     )
-    return {"daily_net": daily}
+    out["day"] = out["day"].dt.strftime("%Y-%m-%d")
+    return {"daily_net": _records(out)}
+
 
+def _debits(df: pd.DataFrame) -> pd.DataFrame:
+    """Debit rows of an enriched frame; build once and share across helpers."""
+    return df[df["is_debit"]] if not df.empty else df
 
-def _detect_credits(df: pd.DataFrame) -> Dict[str, Any]:
+
+def _months_in_period(df: pd.DataFrame) -> float:
+    """Statement span in 30-day months, never less than one."""
+    if df.empty:
+        return 1.0
+    dates = df["date"].to_numpy()
+    days = (dates.max() - dates.min()) / np.timedelta64(1, "D")
+    return max(1.0, float(days) / 30.0)
+
+
+def _top_k_positions(values: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest values, largest first, via partial selection."""
+    k = min(k, values.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(values, -k)[-k:]
+    return top[np.argsort(-values[top], kind="stable")]
+
+
+def _detect_credits(df: pd.DataFrame, debits: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
     """Detect credit-related transactions and calculate monthly credit payments."""
     if df.empty:
-        return {
-            "total_monthly": 0.0,
-            "percentage_of_expenses": 0.0,
-            "recurring_payments": [],
-            "credit_transactions": [],
-            "warning_level": "low",
-        }
-    
-    # Keywords for credit/loan/installment detection
-    credit_keywords = [
-        r"\bкредит\b", r"\bcredit\b", r"\bloan\b", r"\bзайм\b",
-        r"\bkaspi\s*кредит\b", r"\bkaspi\s*red\b", r"\bрассрочк", r"\binstallment\b",
-        r"\bоплат[аы]\s*kaspi\s*кредит", r"\bпогашен", r"\brepayment\b",
-        r"\bкредит\s*для\s*ип\b", r"\bкредит\s*наличными\b",
-    ]
-    
-    import re
-    credit_pattern = re.compile("|".join(credit_keywords), re.IGNORECASE)
-    
-    debits = df[df["amount"] < 0].copy()
+        return dict(_EMPTY_CREDITS)
+
+    if debits is None:
+        debits = _debits(df)
     if debits.empty:
-        return {
-            "total_monthly": 0.0,
-            "percentage_of_expenses": 0.0,
-            "recurring_payments": [],
-            "credit_transactions": [],
-            "warning_level": "low",
-        }
+        return dict(_EMPTY_CREDITS)
     
     # Find credit transactions
-    debits["is_credit"] = debits["description"].apply(
-        lambda x: bool(credit_pattern.search(str(x).lower()))
-    )
-    credit_txns = debits[debits["is_credit"]].copy()
+    # A local mask, not a column: ``debits`` may be shared with other helpers.
+    # Merchants repeat, so run the regex once per distinct description only.
+    descriptions = debits["description"]
+    credit_descs = [d for d in descriptions.unique() if _CREDIT_PATTERN.search(d)]
+    is_credit = descriptions.isin(credit_descs)
+    credit_txns = debits[is_credit]
     
     if credit_txns.empty:
-        return {
-            "total_monthly": 0.0,
-            "percentage_of_expenses": 0.0,
-            "recurring_payments": [],
-            "credit_transactions": [],
-            "warning_level": "low",
-        }
+        return dict(_EMPTY_CREDITS)
     
-    total_credit_spending = float((-credit_txns["amount"]).sum())
-    total_expenses = float((-debits["amount"]).sum())
+    total_credit_spending = float(credit_txns["spend"].sum())
+    total_expenses = float(debits["spend"].sum())
     credit_percentage = (total_credit_spending / total_expenses * 100) if total_expenses > 0 else 0.0
     
     # Detect recurring monthly payments (same merchant, similar amount, monthly pattern)
-    credit_txns["month"] = credit_txns["date"].dt.to_period("M").astype(str)
-    monthly_credits = credit_txns.groupby("month", as_index=False).agg(
-        total=("amount", "sum"),
-        count=("amount", "count"),
-    )
-    monthly_credits["total"] = -monthly_credits["total"]  # Make positive
+    monthly_credits = credit_txns.groupby("month", sort=False, observed=True)["spend"].sum()
     
     # Calculate average monthly credit payment
-    avg_monthly = float(monthly_credits["total"].mean()) if not monthly_credits.empty else 0.0
+    avg_monthly = float(monthly_credits.mean()) if len(monthly_credits.index) else 0.0
     
     # Find recurring patterns (merchants that appear multiple times with similar amounts)
-    recurring = []
-    for merchant in credit_txns["description"].unique():
-        merchant_txns = credit_txns[credit_txns["description"] == merchant]
-        if len(merchant_txns) >= 2:  # At least 2 occurrences
-            amounts = (-merchant_txns["amount"]).tolist()
-            avg_amount = sum(amounts) / len(amounts)
-            recurring.append({
-                "merchant": merchant,
-                "monthly_amount": avg_amount,
-                "frequency": len(merchant_txns),
-            })
+    merchants = credit_txns.groupby("description", as_index=False, sort=False, observed=True).agg(
+        monthly_amount=("spend", "mean"),
+        frequency=("spend", "size"),
+    )
+    merchants = merchants[merchants["frequency"] >= 2]  # At least 2 occurrences
+    recurring = _records(
+        merchants.nlargest(5, "monthly_amount")  # Top 5
+        .rename(columns={"description": "merchant"})
+    )
     
-    recurring.sort(key=lambda x: x["monthly_amount"], reverse=True)
+    first_credits = credit_txns.head(10)
+    credit_records = [
+        {"date": d, "description": desc, "amount": float(amt)}
+        for d, desc, amt in zip(
+            first_credits["date"].dt.strftime("%Y-%m-%dT%H:%M:%S").to_numpy(),
+            first_credits["description"].to_numpy(),
+            first_credits["amount"].to_numpy(),
+        )
+    ]
     
-    # Determine warning level
-    if credit_percentage > 40:
-        warning = "high"
-    elif credit_percentage > 25:
-        warning = "medium"
-    else:
-        warning = "low"
+    # Determine warning level (above 25% medium, above 40% high)
+    warning = _WARNING_LEVELS[bisect_left(_WARNING_THRESHOLDS, credit_percentage)]
     
     return {
         "total_monthly": avg_monthly,
         "total_period": total_credit_spending,
         "percentage_of_expenses": credit_percentage,
-        "recurring_payments": recurring[:5],  # Top 5
-        "credit_transactions": [
-            {
-                "date": r["date"].isoformat(),
-                "description": r["description"],
-                "amount": float(r["amount"]),
-            }
-            for _, r in credit_txns.head(10).iterrows()
-        ],
+        "recurring_payments": recurring,
+        "credit_transactions": credit_records,
         "warning_level": warning,
     }
 
 
-def _detect_money_leaks(df: pd.DataFrame) -> Dict[str, Any]:
+def _detect_money_leaks(df: pd.DataFrame, debits: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
     """Detect frequent small transactions and repeating merchants that add up."""
     if df.empty:
-        return {
-            "total_monthly": 0.0,
-            "leak_sources": [],
-            "insight": "",
-        }
+        return dict(_EMPTY_LEAKS)
     
-    debits = df[df["amount"] < 0].copy()
-    if debits.empty:
-        return {
-            "total_monthly": 0.0,
-            "leak_sources": [],
-            "insight": "",
-        }
+    if debits is None:
+        debits = _debits(df)
     
-    # Small transactions (under 5000 KZT) that happen frequently
+    # Small debits (under 5000 KZT) that happen frequently
     small_threshold = 5000.0
-    small_txns = debits[(-debits["amount"]) <= small_threshold].copy()
+    small_txns = debits.loc[debits["spend"] <= small_threshold, ["description", "spend", "month"]]
     
     if small_txns.empty:
-        return {
-            "total_monthly": 0.0,
-            "leak_sources": [],
-            "insight": "",
-        }
+        return dict(_EMPTY_LEAKS)
     
     # Group by merchant/description
-    small_txns["abs_amount"] = -small_txns["amount"]
     leaks = (
-        small_txns.groupby("description", as_index=False)
+        small_txns.groupby("description", as_index=False, sort=False, observed=True)
         .agg(
-            total=("abs_amount", "sum"),
-            count=("abs_amount", "count"),
-            avg=("abs_amount", "mean"),
+            total=("spend", "sum"),
+            count=("spend", "size"),
+            avg=("spend", "mean"),
         )
-        .sort_values("total", ascending=False)
     )
     
-    # Filter: at least 3 occurrences and total > 10000 KZT
-    significant_leaks = leaks[(leaks["count"] >= 3) & (leaks["total"] >= 10000)].head(10)
+    # Filter: at least 3 occurrences and total > 10000 KZT; only the top 10 need ordering
+    significant_leaks = leaks[(leaks["count"] >= 3) & (leaks["total"] >= 10000)]
+    significant_leaks = significant_leaks.iloc[_top_k_positions(significant_leaks["total"].to_numpy(), 10)]
     
     leak_sources = [
-        {
-            "merchant": row["description"],
-            "total": float(row["total"]),
-            "count": int(row["count"]),
-            "avg": float(row["avg"]),
-        }
-        for _, row in significant_leaks.iterrows()
+        {"merchant": merchant, "total": float(total), "count": int(count), "avg": float(avg)}
+        for merchant, total, count, avg in zip(
+            significant_leaks["description"].to_numpy(),
+            significant_leaks["total"].to_numpy(),
+            significant_leaks["count"].to_numpy(),
+            significant_leaks["avg"].to_numpy(),
+        )
     ]
     
     # Calculate monthly average
-    small_txns["month"] = small_txns["date"].dt.to_period("M").astype(str)
-    monthly_small = small_txns.groupby("month", as_index=False).agg(total=("abs_amount", "sum"))
-    monthly_avg = float(monthly_small["total"].mean()) if not monthly_small.empty else 0.0
+    monthly_avg = float(small_txns.groupby("month", sort=False, observed=True)["spend"].sum().mean())
     
     return {
         "total_monthly": monthly_avg,
@@ -276,118 +316,127 @@ def _detect_money_leaks(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def _calculate_health_score(
-    totals: Dict[str, float],
-    credit_analysis: Dict[str, Any],
-    leak_analysis: Dict[str, Any],
-    balances: Dict[str, Optional[float]],
-) -> Dict[str, Any]:
-    """Calculate Financial Health Score (0-100) based on multiple factors."""
-    score = 100.0
-    factors = []
-    
-    income = totals.get("income", 0.0)
-    spending = totals.get("spending", 0.0)
-    net = totals.get("net", 0.0)
-    
+_EXPENSE_NOTES = {
+    30: "Отличное соотношение",
+    20: "Хорошее соотношение",
+    10: "Расходы равны доходам",
+    0: "Расходы превышают доходы",
+}
+_CREDIT_NOTES = {
+    25: "Низкая нагрузка",
+    20: "Умеренная нагрузка",
+    10: "Высокая нагрузка",
+    0: "Критическая нагрузка",
+}
+_BUFFER_NOTES = {
+    20: "Хватит на {:.1f} месяцев",
+    15: "Хватит на {:.1f} месяцев",
+    8: "Хватит только на {:.1f} месяц",
+    0: "Нет финансовой подушки",
+}
+_LEAK_NOTES = {
+    15: "Минимальные незаметные траты",
+    10: "Умеренные незаметные траты",
+    5: "Высокие незаметные траты",
+    0: "Критический уровень незаметных трат",
+}
+_NET_NOTES = {10: "Положительный баланс", 0: "Отрицательный баланс"}
+
+# Score ladders as sorted thresholds: "<=" rungs are looked up with bisect_left,
+# ">=" rungs (months of buffer) with bisect_right.
+_EXPENSE_THRESHOLDS, _EXPENSE_SCORES = (70, 85, 100), (30, 20, 10, 0)
+_CREDIT_THRESHOLDS, _CREDIT_SCORES = (10, 20, 30), (25, 20, 10, 0)
+_BUFFER_THRESHOLDS, _BUFFER_SCORES = (1, 3, 6), (0, 8, 15, 20)
+_LEAK_THRESHOLDS, _LEAK_SCORES = (5, 10, 20), (15, 10, 5, 0)
+_HEALTH_THRESHOLDS = (40, 60, 80)
+_HEALTH_STATUSES = (
+    ("Опасность", "negative"),
+    ("Риск", "warning"),
+    ("Хорошо", "positive"),
+    ("Отлично", "positive"),
+)
+
+
+def _score_factors(
+    income: float,
+    spending: float,
+    net: float,
+    credit_pct: float,
+    closing_balance: float,
+    months: float,
+    leak_total: float,
+) -> Tuple[int, int, int, int, int, float]:
+    """Numeric core of the health score: points per factor plus months of buffer covered."""
     # Factor 1: Expenses-to-income ratio (0-30 points)
     if income > 0:
         expense_ratio = (spending / income) * 100
-        if expense_ratio <= 70:
-            exp_score = 30
-            factors.append({"name": "Соотношение расходов к доходам", "score": exp_score, "max": 30, "note": "Отличное соотношение"})
-        elif expense_ratio <= 85:
-            exp_score = 20
-            factors.append({"name": "Соотношение расходов к доходам", "score": exp_score, "max": 30, "note": "Хорошее соотношение"})
-        elif expense_ratio <= 100:
-            exp_score = 10
-            factors.append({"name": "Соотношение расходов к доходам", "score": exp_score, "max": 30, "note": "Расходы равны доходам"})
-        else:
-            exp_score = 0
-            factors.append({"name": "Соотношение расходов к доходам", "score": exp_score, "max": 30, "note": "Расходы превышают доходы"})
-        score = score - (30 - exp_score)
+        exp_score = _EXPENSE_SCORES[bisect_left(_EXPENSE_THRESHOLDS, expense_ratio)]
     else:
-        factors.append({"name": "Соотношение расходов к доходам", "score": 0, "max": 30, "note": "Нет доходов"})
-        score -= 30
-    
+        exp_score = 0
+
     # Factor 2: Credit load (0-25 points)
-    credit_pct = credit_analysis.get("percentage_of_expenses", 0.0)
-    if credit_pct <= 10:
-        credit_score = 25
-        factors.append({"name": "Кредитная нагрузка", "score": credit_score, "max": 25, "note": "Низкая нагрузка"})
-    elif credit_pct <= 20:
-        credit_score = 20
-        factors.append({"name": "Кредитная нагрузка", "score": credit_score, "max": 25, "note": "Умеренная нагрузка"})
-    elif credit_pct <= 30:
-        credit_score = 10
-        factors.append({"name": "Кредитная нагрузка", "score": credit_score, "max": 25, "note": "Высокая нагрузка"})
-    else:
-        credit_score = 0
-        factors.append({"name": "Кредитная нагрузка", "score": credit_score, "max": 25, "note": "Критическая нагрузка"})
-    score = score - (25 - credit_score)
-    
+    credit_score = _CREDIT_SCORES[bisect_left(_CREDIT_THRESHOLDS, credit_pct)]
+
     # Factor 3: Savings buffer (0-20 points)
-    closing_balance = balances.get("closing", 0.0) or 0.0
-    months_in_period = totals.get("months", 1)
-    if isinstance(months_in_period, list):
-        months_in_period = len(months_in_period)
-    monthly_expenses = spending / max(1, float(months_in_period)) if spending > 0 else spending
+    monthly_expenses = spending / max(1, float(months)) if spending > 0 else spending
     # Approximate months from data period
     months_covered = (closing_balance / monthly_expenses) if monthly_expenses > 0 else 0
-    if months_covered >= 6:
-        buffer_score = 20
-        factors.append({"name": "Финансовая подушка", "score": buffer_score, "max": 20, "note": f"Хватит на {months_covered:.1f} месяцев"})
-    elif months_covered >= 3:
-        buffer_score = 15
-        factors.append({"name": "Финансовая подушка", "score": buffer_score, "max": 20, "note": f"Хватит на {months_covered:.1f} месяцев"})
-    elif months_covered >= 1:
-        buffer_score = 8
-        factors.append({"name": "Финансовая подушка", "score": buffer_score, "max": 20, "note": f"Хватит только на {months_covered:.1f} месяц"})
-    else:
-        buffer_score = 0
-        factors.append({"name": "Финансовая подушка", "score": buffer_score, "max": 20, "note": "Нет финансовой подушки"})
-    score = score - (20 - buffer_score)
-    
+    buffer_score = _BUFFER_SCORES[bisect_right(_BUFFER_THRESHOLDS, months_covered)]
+
     # Factor 4: Money leaks (0-15 points)
-    leak_total = leak_analysis.get("total_monthly", 0.0)
     leak_pct = (leak_total / spending * 100) if spending > 0 else 0
-    if leak_pct <= 5:
-        leak_score = 15
-        factors.append({"name": "Незаметные траты", "score": leak_score, "max": 15, "note": "Минимальные незаметные траты"})
-    elif leak_pct <= 10:
-        leak_score = 10
-        factors.append({"name": "Незаметные траты", "score": leak_score, "max": 15, "note": "Умеренные незаметные траты"})
-    elif leak_pct <= 20:
-        leak_score = 5
-        factors.append({"name": "Незаметные траты", "score": leak_score, "max": 15, "note": "Высокие незаметные траты"})
-    else:
-        leak_score = 0
-        factors.append({"name": "Незаметные траты", "score": leak_score, "max": 15, "note": "Критический уровень незаметных трат"})
-    score = score - (15 - leak_score)
-    
+    leak_score = _LEAK_SCORES[bisect_left(_LEAK_THRESHOLDS, leak_pct)]
+
     # Factor 5: Net result (0-10 points)
-    if net > 0:
-        net_score = 10
-        factors.append({"name": "Итоговый результат", "score": net_score, "max": 10, "note": "Положительный баланс"})
-    else:
-        net_score = 0
-        factors.append({"name": "Итоговый результат", "score": net_score, "max": 10, "note": "Отрицательный баланс"})
-    score = score - (10 - net_score)
+    net_score = 10 if net > 0 else 0
+
+    return exp_score, credit_score, buffer_score, leak_score, net_score, months_covered
+
+
+def _calculate_health_score(
+    totals: Dict[str, float],
+    credit_analysis: Dict[str, Any],
+    leak_analysis: Dict[str, Any],
+    balances: Dict[str, Optional[float]],
+) -> Dict[str, Any]:
+    """Calculate Financial Health Score (0-100) based on multiple factors."""
+    income = totals.get("income", 0.0)
+    months_in_period = totals.get("months", 1)
+    if isinstance(months_in_period, list):
+        months_in_period = len(months_in_period)
+
+    exp_score, credit_score, buffer_score, leak_score, net_score, months_covered = _score_factors(
+        income,
+        totals.get("spending", 0.0),
+        totals.get("net", 0.0),
+        credit_analysis.get("percentage_of_expenses", 0.0),
+        balances.get("closing", 0.0) or 0.0,
+        months_in_period,
+        leak_analysis.get("total_monthly", 0.0),
+    )
+
+    factors = [
+        {
+            "name": "Соотношение расходов к доходам",
+            "score": exp_score,
+            "max": 30,
+            "note": _EXPENSE_NOTES[exp_score] if income > 0 else "Нет доходов",
+        },
+        {"name": "Кредитная нагрузка", "score": credit_score, "max": 25, "note": _CREDIT_NOTES[credit_score]},
+        {
+            "name": "Финансовая подушка",
+            "score": buffer_score,
+            "max": 20,
+            "note": _BUFFER_NOTES[buffer_score].format(months_covered),
+        },
+        {"name": "Незаметные траты", "score": leak_score, "max": 15, "note": _LEAK_NOTES[leak_score]},
+        {"name": "Итоговый результат", "score": net_score, "max": 10, "note": _NET_NOTES[net_score]},
+    ]
+    score = 100.0 - sum(f["max"] - f["score"] for f in factors)
     
     score = max(0, min(100, score))  # Clamp to 0-100
     
-    if score >= 80:
-        status = "Отлично"
-        status_color = "positive"
-    elif score >= 60:
-        status = "Хорошо"
-        status_color = "positive"
-    elif score >= 40:
-        status = "Риск"
-        status_color = "warning"
-    else:
-        status = "Опасность"
-        status_color = "negative"
+    status, status_color = _HEALTH_STATUSES[bisect_right(_HEALTH_THRESHOLDS, score)]
     
     return {
         "score": round(score, 1),
@@ -410,6 +459,31 @@ def _get_health_explanation(score: float, status: str) -> str:
         return "Ваши финансы в критическом состоянии. Расходы превышают доходы, высокие кредитные обязательства, нет финансовой подушки. Необходимы радикальные изменения."
 
 
+# Indexed by bisect_right(_BUFFER_THRESHOLDS, months): <1, 1-3, 3-6, 6+ months
+_SAFETY_BUFFER_LEVELS = (
+    (
+        "Критично",
+        "negative",
+        "У вас нет финансовой подушки безопасности. В случае непредвиденных обстоятельств вы можете оказаться в долгах. Немедленно начните откладывать.",
+    ),
+    (
+        "Слабо",
+        "warning",
+        "Ваша финансовая подушка покрывает только {:.1f} месяца расходов. Это рискованно. Старайтесь накопить минимум 3 месяца расходов.",
+    ),
+    (
+        "Приемлемо",
+        "positive",
+        "Ваша финансовая подушка покрывает {:.1f} месяцев расходов. Это хороший уровень, но можно увеличить до 6 месяцев.",
+    ),
+    (
+        "Безопасно",
+        "positive",
+        "Ваша финансовая подушка покрывает {:.1f} месяцев расходов. Это отличный показатель финансовой безопасности.",
+    ),
+)
+
+
 def _calculate_safety_buffer(
     spending: float,
     closing_balance: Optional[float],
@@ -431,22 +505,8 @@ def _calculate_safety_buffer(
     else:
         months = closing_balance / avg_monthly_spending
     
-    if months >= 6:
-        status = "Безопасно"
-        status_color = "positive"
-        explanation = f"Ваша финансовая подушка покрывает {months:.1f} месяцев расходов. Это отличный показатель финансовой безопасности."
-    elif months >= 3:
-        status = "Приемлемо"
-        status_color = "positive"
-        explanation = f"Ваша финансовая подушка покрывает {months:.1f} месяцев расходов. Это хороший уровень, но можно увеличить до 6 месяцев."
-    elif months >= 1:
-        status = "Слабо"
-        status_color = "warning"
-        explanation = f"Ваша финансовая подушка покрывает только {months:.1f} месяца расходов. Это рискованно. Старайтесь накопить минимум 3 месяца расходов."
-    else:
-        status = "Критично"
-        status_color = "negative"
-        explanation = "У вас нет финансовой подушки безопасности. В случае непредвиденных обстоятельств вы можете оказаться в долгах. Немедленно начните откладывать."
+    status, status_color, template = _SAFETY_BUFFER_LEVELS[bisect_right(_BUFFER_THRESHOLDS, months)]
+    explanation = template.format(months)
     
     return {
         "months": round(months, 1),
@@ -458,6 +518,19 @@ def _calculate_safety_buffer(
     }
 
 
+_HORIZONS = np.array([6.0, 12.0])  # Forecast horizons in months
+
+
+def _total_savings(recommendations: List[Dict[str, Any]]) -> float:
+    """Sum of the monthly savings promised by all recommendations."""
+    savings = np.fromiter(
+        (r.get("monthly_savings", 0.0) for r in recommendations),
+        dtype=np.float64,
+        count=len(recommendations),
+    )
+    return float(savings.sum())
+
+
 def _generate_future_scenarios(
     totals: Dict[str, float],
     credit_analysis: Dict[str, Any],
@@ -476,41 +549,44 @@ def _generate_future_scenarios(
     monthly_net = current_net / months_in_period
     
     # Scenario 1: If nothing changes
+    net_6m, net_12m = (monthly_net * _HORIZONS).tolist()
     scenario1 = {
         "title": "Если ничего не менять",
         "description": "Текущая ситуация сохранится без изменений",
         "monthly_balance": monthly_net,
-        "6_month_outcome": monthly_net * 6,
-        "12_month_outcome": monthly_net * 12,
+        "6_month_outcome": net_6m,
+        "12_month_outcome": net_12m,
         "risk_level": "high" if monthly_net < 0 else "medium",
-        "summary": f"Через 6 месяцев: {monthly_net * 6:+,.0f} KZT. Через год: {monthly_net * 12:+,.0f} KZT." if monthly_net != 0 else "Баланс не изменится.",
+        "summary": f"Через 6 месяцев: {net_6m:+,.0f} KZT. Через год: {net_12m:+,.0f} KZT." if monthly_net != 0 else "Баланс не изменится.",
     }
     
     # Scenario 2: If recommendations are followed
-    total_savings = sum(r.get("monthly_savings", 0.0) for r in recommendations)
+    total_savings = _total_savings(recommendations)
     scenario2_monthly = monthly_net + total_savings
+    s2_6m, s2_12m = (scenario2_monthly * _HORIZONS).tolist()
     scenario2 = {
         "title": "Если следовать рекомендациям",
         "description": f"Реализуете все рекомендации (экономия ~{total_savings:,.0f} KZT/месяц)",
         "monthly_balance": scenario2_monthly,
-        "6_month_outcome": scenario2_monthly * 6,
-        "12_month_outcome": scenario2_monthly * 12,
+        "6_month_outcome": s2_6m,
+        "12_month_outcome": s2_12m,
         "risk_level": "low" if scenario2_monthly > 0 else "medium",
-        "summary": f"Через 6 месяцев: {scenario2_monthly * 6:+,.0f} KZT. Через год: {scenario2_monthly * 12:+,.0f} KZT. Экономия: {total_savings:,.0f} KZT/месяц.",
+        "summary": f"Через 6 месяцев: {s2_6m:+,.0f} KZT. Через год: {s2_12m:+,.0f} KZT. Экономия: {total_savings:,.0f} KZT/месяц.",
     }
     
     # Scenario 3: If credit load is optimized
     current_credit_monthly = credit_analysis.get("total_monthly", 0.0)
     credit_reduction = current_credit_monthly * 0.3 if credit_analysis.get("percentage_of_expenses", 0) > 25 else 0.0
     scenario3_monthly = monthly_net + credit_reduction
+    s3_6m, s3_12m = (scenario3_monthly * _HORIZONS).tolist()
     scenario3 = {
         "title": "Если оптимизировать кредиты",
         "description": f"Снизить кредитную нагрузку на 30% (экономия ~{credit_reduction:,.0f} KZT/месяц)" if credit_reduction > 0 else "Кредитная нагрузка уже оптимальна",
         "monthly_balance": scenario3_monthly,
-        "6_month_outcome": scenario3_monthly * 6,
-        "12_month_outcome": scenario3_monthly * 12,
+        "6_month_outcome": s3_6m,
+        "12_month_outcome": s3_12m,
         "risk_level": "low" if scenario3_monthly > 0 else "medium",
-        "summary": f"Через 6 месяцев: {scenario3_monthly * 6:+,.0f} KZT. Через год: {scenario3_monthly * 12:+,.0f} KZT." if credit_reduction > 0 else "Изменения минимальны.",
+        "summary": f"Через 6 месяцев: {s3_6m:+,.0f} KZT. Через год: {s3_12m:+,.0f} KZT." if credit_reduction > 0 else "Изменения минимальны.",
     }
     
     return [scenario1, scenario2, scenario3]
@@ -579,7 +655,7 @@ def _calculate_before_after(
     current_credit_pct = credit_analysis.get("percentage_of_expenses", 0.0)
     current_leaks = leak_analysis.get("total_monthly", 0.0)
     
-    total_savings = sum(r.get("monthly_savings", 0.0) for r in recommendations)
+    total_savings = _total_savings(recommendations)
     future_net = current_net + total_savings
     
     # Estimate future credit percentage (assume 20% reduction in credit spending)
@@ -685,68 +761,106 @@ def _generate_recommendations(
     return recommendations[:5]  # Max 5 recommendations
 
 
-def _anomalies(df: pd.DataFrame, top_n: int = 10) -> List[Dict[str, Any]]:
+def _anomalies(
+    df: pd.DataFrame,
+    top_n: int = 10,
+    debits: Optional[pd.DataFrame] = None,
+) -> List[Dict[str, Any]]:
     """
     Simple anomaly heuristic:
     - flag unusually large debits relative to typical debit size (median-based)
     - always include top-N absolute debits
     """
-    if df.empty:
+    if df.empty or top_n <= 0:
         return []
 
-    debits = df[df["amount"] < 0].copy()
+    if debits is None:
+        debits = _debits(df)
     if debits.empty:
         return []
 
-    debit_sizes = (-debits["amount"]).tolist()
-    typical = median(debit_sizes) if debit_sizes else 0.0
+    abs_debit = debits["spend"].to_numpy()
+    typical = float(np.median(abs_debit))
     threshold = typical * 4.0 if typical > 0 else float("inf")
 
-    debits["abs_debit"] = -debits["amount"]
-    debits["reason"] = debits["abs_debit"].apply(
-        lambda x: "large_debit" if x >= threshold else "top_spend"
-    )
+    # Partial selection of the top-N debits instead of sorting every debit
+    top_idx = _top_k_positions(abs_debit, top_n)
+    reasons = np.where(abs_debit[top_idx] >= threshold, "large_debit", "top_spend")
+
+    top = debits.iloc[top_idx]
+    return [
+        {
+            "date": d,
+            "description": desc,
+            "amount": float(amt),
+            "balance": None if pd.isna(bal) else float(bal),
+            "category": cat,
+            "reason": str(reason),
+        }
+        for d, desc, amt, bal, cat, reason in zip(
+            top["date"].dt.strftime("%Y-%m-%dT%H:%M:%S").to_numpy(),
+            top["description"].to_numpy(),
+            top["amount"].to_numpy(),
+            top["balance"].to_numpy(),
+            top["category"].to_numpy(),
+            reasons,
+        )
+    ]
+
+
+def _balances(df: pd.DataFrame) -> Tuple[Optional[float], Optional[float]]:
+    """Opening and closing balance: first and last known balance in date order."""
+    if df.empty:
+        return None, None
+    bals = df["balance"].to_numpy(dtype=np.float64)
+    bals = bals[~np.isnan(bals)]
+    if bals.size == 0:
+        return None, None
+    return float(bals[0]), float(bals[-1])
 
-    top = debits.sort_values("abs_debit", ascending=False).head(top_n)
-    out = []
-    for _, r in top.iterrows():
-        out.append(
+
+def _transaction_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Per-transaction output rows, built column-wise from the enriched frame."""
+    if df.empty:
+        return []
+    balance = df["balance"]
+    return _records(
+        pd.DataFrame(
             {
-                "date": r["date"].isoformat(),
-                "description": r["description"],
-                "amount": float(r["amount"]),
-                "balance": None if pd.isna(r["balance"]) else float(r["balance"]),
-                "category": categorize(r["description"]),
-                "reason": r["reason"],
+                "date": df["date"].dt.strftime("%Y-%m-%dT%H:%M:%S"),
+                "description": df["description"],
+                "amount": df["amount"],
+                "balance": balance.astype(object).where(balance.notna(), None),
+                "category": df["category"],
             }
         )
-    return out
+    )
 
 
 def build_analysis(
-    transactions: List[Transaction],
+    transactions: Union[List[Transaction], StatementSummary],
     currency: str = "KZT",
     bank: str = "kaspi",
 ) -> Dict[str, Any]:
+    # A StatementSummary hands over its column arrays, skipping the per-row pass
     df = _to_df(transactions)
-    df["category"] = df["description"].apply(categorize) if not df.empty else []
 
-    total_income = float(df[df["amount"] > 0]["amount"].sum()) if not df.empty else 0.0
-    total_spending = float((-df[df["amount"] < 0]["amount"]).sum()) if not df.empty else 0.0
-    net = float(df["amount"].sum()) if not df.empty else 0.0
+    if df.empty:
+        total_income = total_spending = net = 0.0
+    else:
+        # income/spend are precomputed clips of amount: sum the raw arrays
+        # instead of materialising boolean-masked Series for each total.
+        total_income = float(df["income"].to_numpy().sum())
+        total_spending = float(df["spend"].to_numpy().sum())
+        net = float(df["amount"].to_numpy().sum())
 
-    opening_balance: Optional[float] = None
-    closing_balance: Optional[float] = None
-    if not df.empty and df["balance"].notna().any():
-        first = df["balance"].dropna().iloc[0]
-        last = df["balance"].dropna().iloc[-1]
-        opening_balance = float(first)
-        closing_balance = float(last)
+    opening_balance, closing_balance = _balances(df)
 
+    debits = _debits(df)
     weekly, monthly = _weekly_monthly_summaries(df)
     category_breakdown = _category_breakdown(df)
-    credit_analysis = _detect_credits(df)
-    leak_analysis = _detect_money_leaks(df)
+    credit_analysis = _detect_credits(df, debits)
+    leak_analysis = _detect_money_leaks(df, debits)
     
     totals_dict = {"income": total_income, "spending": total_spending, "net": net, "months": len(monthly)}
     balances_dict = {"opening": opening_balance, "closing": closing_balance}
@@ -796,7 +910,8 @@ def build_analysis(
             "currency": currency,
             "categories_version": categories_version(),
             "generated_at": datetime.now(timezone.utc).isoformat(),
-            "transactions": int(len(transactions)),
+            # Rows kept by _to_df, so the count matches the "transactions" list
+            "transactions": int(len(df)),
         },
         "totals": {
             "income": total_income,
@@ -808,7 +923,7 @@ def build_analysis(
         "weekly_summary": weekly,
         "monthly_summary": monthly,
         "trends": _trends(df),
-        "anomalies": _anomalies(df),
+        "anomalies": _anomalies(df, debits=debits),
         "credit_analysis": credit_analysis,
         "money_leaks": leak_analysis,
         "recommendations": recommendations,
@@ -817,15 +932,6 @@ def build_analysis(
         "future_scenarios": future_scenarios,
         "action_plan": action_plan,
         "before_after": before_after,
-        "transactions": [
-            {
-                "date": t.date.isoformat(),
-                "description": t.description,
-                "amount": t.amount,
-                "balance": t.balance,
-                "category": categorize(t.description),
-            }
-            for t in transactions
-        ],
+        "transactions": _transaction_records(df),
     }
 
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import json
 import os
-import tempfile
-from pathlib import Path
+from functools import partial
 from typing import Optional
 
 from fastapi import FastAPI, File, Form, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .analytics import build_analysis
 from .combined_analysis import build_combined_analysis
@@ -16,8 +18,14 @@ from .models import QuestionnaireAnswers
 from .parser import extract_transactions
 
 MAX_BYTES = 1_000_000  # 1MB
+_READ_CHUNK = 64 * 1024
 
-app = FastAPI(title="Bank PDF Statement Analyzer", version="0.1.0")
+# orjson serializes the large analysis payload (and any NumPy scalars) natively
+app = FastAPI(
+    title="Bank PDF Statement Analyzer",
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +36,21 @@ app.add_middleware(
 )
 
 
+async def _read_capped(upload: UploadFile, cap: int, detail: str) -> bytes:
+    """Read an upload in chunks, failing with 413 as soon as it exceeds ``cap`` bytes."""
+    # Starlette records the spooled size while parsing the form: reject without reading
+    if upload.size is not None and upload.size > cap:
+        raise HTTPException(status_code=413, detail=detail)
+    buf = bytearray()
+    while True:
+        chunk = await upload.read(_READ_CHUNK)
+        if not chunk:
+            return bytes(buf)
+        buf.extend(chunk)
+        if len(buf) > cap:
+            raise HTTPException(status_code=413, detail=detail)
+
+
 @app.get("/health")
 def health() -> dict:
     return {"ok": True}
@@ -40,6 +63,7 @@ async def analyze(
     currency: str = "KZT",
     questionnaire: Optional[str] = Form(None),  # JSON string
     credit_statement: Optional[UploadFile] = File(None),
+    credit_tables: bool = True,
 ) -> dict:
     """
     Analyze bank statement(s) with optional questionnaire and credit statement.
@@ -47,13 +71,12 @@ async def analyze(
     - file: Regular bank statement (required)
     - credit_statement: Credit/loan statement (optional)
     - questionnaire: JSON string with user answers (optional)
+    - credit_tables: set to false for text-only credit statements to skip table detection
     """
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only .pdf files are supported")
 
-    data = await file.read()
-    if len(data) > MAX_BYTES:
-        raise HTTPException(status_code=413, detail="File too large (max 1MB)")
+    data = await _read_capped(file, MAX_BYTES, "File too large (max 1MB)")
 
     # Parse questionnaire if provided
     questionnaire_answers = None
@@ -64,48 +87,52 @@ async def analyze(
         except (json.JSONDecodeError, TypeError, ValueError) as e:
             raise HTTPException(status_code=400, detail=f"Invalid questionnaire format: {e}") from e
 
-    # Parse regular statement
-    suffix = Path(file.filename).suffix or ".pdf"
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmp_path = Path(tmpdir) / f"upload{suffix}"
-        tmp_path.write_bytes(data)
+    credit_data = None
+    if credit_statement:
+        if not credit_statement.filename.lower().endswith(".pdf"):
+            raise HTTPException(status_code=400, detail="Credit statement must be PDF")
+        credit_data = await _read_capped(credit_statement, MAX_BYTES, "Credit statement too large (max 1MB)")
+
+    # Parse both statements concurrently in worker threads. pdfplumber reads
+    # from in-memory streams, so the uploads never touch the disk.
+    loop = asyncio.get_running_loop()
+    tasks = [loop.run_in_executor(None, extract_transactions, io.BytesIO(data), 30)]
+    if credit_data is not None:
+        tasks.append(
+            loop.run_in_executor(
+                None,
+                partial(extract_credit_transactions, io.BytesIO(credit_data), 30, use_tables=credit_tables),
+            )
+        )
+    results = await asyncio.gather(*tasks, return_exceptions=True)
 
-        try:
-            txns = extract_transactions(str(tmp_path), max_pages=30)
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Failed to parse PDF: {e}") from e
-
-        # Parse credit statement if provided
-        credit_txns = None
-        if credit_statement:
-            if not credit_statement.filename.lower().endswith(".pdf"):
-                raise HTTPException(status_code=400, detail="Credit statement must be PDF")
-            
-            credit_data = await credit_statement.read()
-            if len(credit_data) > MAX_BYTES:
-                raise HTTPException(status_code=413, detail="Credit statement too large (max 1MB)")
-            
-            credit_path = Path(tmpdir) / f"credit{suffix}"
-            credit_path.write_bytes(credit_data)
-            
-            try:
-                credit_txns = extract_credit_transactions(str(credit_path), max_pages=30)
-            except Exception as e:
-                raise HTTPException(status_code=422, detail=f"Failed to parse credit statement: {e}") from e
+    main_result = results[0]
+    credit_result = results[1] if len(results) > 1 else None
+    if isinstance(main_result, Exception):
+        raise HTTPException(status_code=422, detail=f"Failed to parse PDF: {main_result}") from main_result
+    if isinstance(credit_result, Exception):
+        raise HTTPException(status_code=422, detail=f"Failed to parse credit statement: {credit_result}") from credit_result
+    txns = main_result
+    credit_txns = credit_result
 
     # Questionnaire is now mandatory for accurate analysis
-    # Use combined analysis if questionnaire provided
+    # Use combined analysis if questionnaire provided. The analysis is CPU-bound
+    # pandas work, so it runs in the thread pool to keep the event loop free.
     if questionnaire_answers:
-        return build_combined_analysis(
-            txns,
-            currency=currency,
-            bank=bank,
-            questionnaire=questionnaire_answers,
-            credit_transactions=credit_txns,
+        return await loop.run_in_executor(
+            None,
+            partial(
+                build_combined_analysis,
+                txns,
+                currency=currency,
+                bank=bank,
+                questionnaire=questionnaire_answers,
+                credit_transactions=credit_txns,
+            ),
         )
     
     # Fallback to regular analysis (but warn that it's incomplete)
-    result = build_analysis(txns, currency=currency, bank=bank)
+    result = await loop.run_in_executor(None, partial(build_analysis, txns, currency=currency, bank=bank))
     result["warning"] = "Questionnaire not provided. Analysis is incomplete. Please provide questionnaire for accurate financial assessment."
     return result
 
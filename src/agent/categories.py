@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
@@ -36,14 +37,46 @@ KASPI_RULES: List[CategoryRule] = [
 ]
 
 
+def _fuse(rules: List[CategoryRule]) -> re.Pattern:
+    """One pattern for a whole rule list: group ``r<i>`` matches rule ``i``.
+
+    The alternation sits in a lookahead, so ``finditer`` tries every position
+    and, at each one, reports the lowest-index rule matching there. The minimum
+    over all hits is therefore the first rule that matches anywhere, exactly as
+    looping over the rules in order would give.
+    """
+    alts = "|".join(
+        f"(?P<r{i}>{'|'.join(p.pattern for p in rule.patterns)})" for i, rule in enumerate(rules)
+    )
+    return re.compile(f"(?=(?:{alts}))", re.IGNORECASE)
+
+
+_KASPI_FUSED = _fuse(KASPI_RULES)
+
+
 def categorize(description: str, rules: Optional[List[CategoryRule]] = None) -> str:
-    rules = rules or KASPI_RULES
+    if not rules:
+        return _categorize_kaspi(description)
     for rule in rules:
         if rule.matches(description):
             return rule.category
     return "other"
 
 
+@lru_cache(maxsize=65536)
+def _categorize_kaspi(description: str) -> str:
+    # Default rules are fixed, so results can be memoized per description; the
+    # bound keeps a long-running server from growing the cache without limit
+    best = len(KASPI_RULES)
+    for m in _KASPI_FUSED.finditer(description.lower()):
+        idx = int(m.lastgroup[1:])
+        if idx < best:
+            best = idx
+            if best == 0:
+                break
+    return KASPI_RULES[best].category if best < len(KASPI_RULES) else "other"
+
+
 def categories_version() -> str:
     # bump when you change rules materially; helps you invalidate cached results
     return "kaspi-v1"
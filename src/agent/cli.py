@@ -1,7 +1,7 @@
-import json
 from pathlib import Path
 from typing import Optional
 
+import orjson
 import typer
 from rich.console import Console
 from rich.table import Table
@@ -42,17 +42,18 @@ def analyze(
     output: Optional[Path] = typer.Option(
         None, "--output", "-o", help="Optional path to save JSON"
     ),
+    workers: int = typer.Option(1, help="Parse pages in this many processes (long statements)"),
 ) -> None:
     """Extract transactions from a PDF and emit JSON."""
     if not pdf.exists():
         typer.echo(f"File not found: {pdf}")
         raise typer.Exit(code=1)
 
-    statement = analyze_statement(str(pdf), currency=currency)
+    statement = analyze_statement(str(pdf), currency=currency, workers=workers)
 
-    data = build_analysis(statement.transactions, currency=currency, bank="kaspi")
+    data = build_analysis(statement, currency=currency, bank="kaspi")
 
-    json_output = json.dumps(data, indent=2)
+    json_output = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
     if output:
         output.write_text(json_output, encoding="utf-8")
         typer.echo(f"Wrote {output}")
@@ -1,30 +1,45 @@
 """Combined financial analysis merging questionnaire, regular statement, and credit statement."""
 from __future__ import annotations
 
+import re
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
 from .analytics import (
+    _balances,
     _calculate_before_after,
     _calculate_health_score,
     _calculate_safety_buffer,
     _category_breakdown,
+    _debits,
     _detect_credits,
     _detect_money_leaks,
     _generate_action_plan,
     _generate_future_scenarios,
     _generate_recommendations,
+    _months_in_period,
     _to_df,
+    _transaction_records,
     _trends,
     _weekly_monthly_summaries,
-    categorize,
     categories_version,
 )
 from .models import CreditTransaction, QuestionnaireAnswers, Transaction
 from .reality_analysis import build_financial_reality_summary, compare_declared_vs_detected
 
+# Keywords for credit inflows (transactions that look like loans/credits)
+_CREDIT_INFLOW_KEYWORDS = [
+    r"\bкредит\b",
+    r"\bloan\b",
+    r"\bзайм\b",
+    r"\bкредит\s*наличными\b",
+    r"\bкредит\s*для\s*ип\b",
+]
+_CREDIT_INFLOW_PATTERN = re.compile("|".join(_CREDIT_INFLOW_KEYWORDS), re.IGNORECASE)
+
 
 def _analyze_credit_statement(credit_txns: List[CreditTransaction]) -> Dict[str, Any]:
     """Analyze credit statement to extract debt structure and behavior."""
@@ -40,11 +55,18 @@ def _analyze_credit_statement(credit_txns: List[CreditTransaction]) -> Dict[str,
             "note": "Credit statements show cash flows, not total active debt. Total debt must be declared by user.",
         }
     
-    loans_issued = [t for t in credit_txns if t.amount > 0]
-    repayments = [t for t in credit_txns if t.amount < 0]
-    
-    total_loans = sum(t.amount for t in loans_issued)
-    total_repayments = sum(-t.amount for t in repayments)
+    # One pass splits loans from repayments and totals both
+    loans_issued: List[CreditTransaction] = []
+    repayments: List[CreditTransaction] = []
+    total_loans = 0.0
+    total_repayments = 0.0
+    for t in credit_txns:
+        if t.amount > 0:
+            loans_issued.append(t)
+            total_loans += t.amount
+        elif t.amount < 0:
+            repayments.append(t)
+            total_repayments -= t.amount
     
     # Net credit flow: money that entered account from credits minus repayments
     # This is NOT active debt - we cannot calculate active debt from statements
@@ -53,6 +75,9 @@ def _analyze_credit_statement(credit_txns: List[CreditTransaction]) -> Dict[str,
     # Detect refinancing pattern: loan → repayment → new loan within short period
     refinancing_detected = False
     if len(loans_issued) >= 2:
+        # Sorted repayment dates let each loan pair test "any repayment strictly
+        # between" with two bisections instead of rescanning every repayment
+        repay_dates = sorted(r.date for r in repayments)
         # Check if loans are followed by repayments and then new loans
         for i in range(len(loans_issued) - 1):
             loan1 = loans_issued[i]
@@ -61,11 +86,7 @@ def _analyze_credit_statement(credit_txns: List[CreditTransaction]) -> Dict[str,
             # If new loan within 30 days of previous, might be refinancing
             if days_between <= 30:
                 # Check if there was a repayment between them
-                repayments_between = [
-                    r for r in repayments
-                    if loan1.date < r.date < loan2.date
-                ]
-                if repayments_between:
+                if bisect_right(repay_dates, loan1.date) < bisect_left(repay_dates, loan2.date):
                     refinancing_detected = True
                     break
     
@@ -117,11 +138,10 @@ def _analyze_credit_statement(credit_txns: List[CreditTransaction]) -> Dict[str,
 
 
 def _calculate_real_income(
-    transactions: List[Transaction],
+    df: pd.DataFrame,
     credit_analysis: Dict[str, Any],
 ) -> Dict[str, Any]:
-    """Calculate REAL income excluding credit inflows."""
-    df = _to_df(transactions)
+    """Calculate REAL income excluding credit inflows, from the enriched statement frame."""
     if df.empty:
         return {
             "total_income": 0.0,
@@ -130,25 +150,13 @@ def _calculate_real_income(
             "credit_dependency_ratio": 0.0,
         }
     
-    # Identify credit inflows (transactions that look like loans/credits)
-    credit_keywords = [
-        r"\bкредит\b",
-        r"\bloan\b",
-        r"\bзайм\b",
-        r"\bкредит\s*наличными\b",
-        r"\bкредит\s*для\s*ип\b",
-    ]
-    
-    import re
-    credit_pattern = re.compile("|".join(credit_keywords), re.IGNORECASE)
-    
-    income_txns = df[df["amount"] > 0].copy()
-    credit_inflows = income_txns[
-        income_txns["description"].str.lower().str.contains(credit_pattern.pattern, regex=True, na=False)
-    ]
-    
-    total_income = float(income_txns["amount"].sum())
-    credit_inflow_amount = float(credit_inflows["amount"].sum()) if not credit_inflows.empty else 0.0
+    # Identify credit inflows; the pattern is case-insensitive, so no lower() pass.
+    # "income" is zero on debits, so masked sums over it need no income-row copy.
+    is_credit_inflow = df["description"].str.contains(_CREDIT_INFLOW_PATTERN, na=False).to_numpy(dtype=bool)
+    income = df["income"].to_numpy()
+    
+    total_income = float(income.sum())
+    credit_inflow_amount = float(income[is_credit_inflow].sum())
     real_income = total_income - credit_inflow_amount
     
     credit_dependency = (credit_inflow_amount / total_income * 100) if total_income > 0 else 0.0
@@ -291,27 +299,21 @@ def build_combined_analysis(
     if df.empty:
         return {"error": "No transactions found"}
     
-    df["category"] = df["description"].apply(categorize) if not df.empty else []
-    
     # Basic totals
-    total_income = float(df[df["amount"] > 0]["amount"].sum()) if not df.empty else 0.0
-    total_spending = float((-df[df["amount"] < 0]["amount"]).sum()) if not df.empty else 0.0
-    net = float(df["amount"].sum()) if not df.empty else 0.0
+    # income/spend are precomputed clips of amount: sum the raw arrays
+    total_income = float(df["income"].to_numpy().sum())
+    total_spending = float(df["spend"].to_numpy().sum())
+    net = float(df["amount"].to_numpy().sum())
     
     # Balances
-    opening_balance: Optional[float] = None
-    closing_balance: Optional[float] = None
-    if not df.empty and df["balance"].notna().any():
-        first = df["balance"].dropna().iloc[0]
-        last = df["balance"].dropna().iloc[-1]
-        opening_balance = float(first)
-        closing_balance = float(last)
+    opening_balance, closing_balance = _balances(df)
     
     # Regular analysis components
+    debits = _debits(df)
     weekly, monthly = _weekly_monthly_summaries(df)
     category_breakdown = _category_breakdown(df)
-    credit_analysis = _detect_credits(df)
-    leak_analysis = _detect_money_leaks(df)
+    credit_analysis = _detect_credits(df, debits)
+    leak_analysis = _detect_money_leaks(df, debits)
     
     # Credit statement analysis
     credit_statement_analysis = {}
@@ -319,13 +321,13 @@ def build_combined_analysis(
         credit_statement_analysis = _analyze_credit_statement(credit_transactions)
     
     # Calculate REAL income (excluding credit inflows)
-    real_income_analysis = _calculate_real_income(transactions, credit_analysis)
+    real_income_analysis = _calculate_real_income(df, credit_analysis)
     
     # Compare declared vs detected values
-    comparison = compare_declared_vs_detected(transactions, questionnaire)
+    comparison = compare_declared_vs_detected(df, questionnaire)
     
-    # Calculate detected monthly averages (simplified - assume 1 month period)
-    months_in_period = 1.0  # TODO: Calculate from date range
+    # Calculate detected monthly averages over the statement's date range
+    months_in_period = _months_in_period(df)
     detected_monthly_income = total_income / months_in_period
     detected_monthly_expenses = total_spending / months_in_period
     
@@ -369,8 +371,12 @@ def build_combined_analysis(
     if questionnaire and questionnaire.primary_goal:
         goal = questionnaire.primary_goal
         if goal == "reduce_debt":
-            # Prioritize debt reduction recommendations
-            recommendations.sort(key=lambda r: "кредит" in r.get("title", "").lower(), reverse=True)
+            # Prioritize debt reduction recommendations: a stable two-way
+            # partition, same order as a reverse sort on the boolean key
+            is_debt = ["кредит" in r.get("title", "").lower() for r in recommendations]
+            recommendations = [r for r, debt in zip(recommendations, is_debt) if debt] + [
+                r for r, debt in zip(recommendations, is_debt) if not debt
+            ]
         elif goal == "save":
             # Prioritize savings recommendations
             recommendations.sort(key=lambda r: r.get("monthly_savings", 0), reverse=True)
@@ -418,7 +424,8 @@ def build_combined_analysis(
             "currency": currency,
             "categories_version": categories_version(),
             "generated_at": datetime.now(timezone.utc).isoformat(),
-            "transactions": int(len(transactions)),
+            # Rows kept by _to_df, so the count matches the "transactions" list
+            "transactions": int(len(df)),
             "has_questionnaire": questionnaire is not None,
             "has_credit_statement": credit_transactions is not None,
         },
@@ -453,14 +460,5 @@ def build_combined_analysis(
             "income_stability": questionnaire.income_stability if questionnaire else None,
             "total_debt": questionnaire.total_outstanding_debt if questionnaire else None,
         } if questionnaire else None,
-        "transactions": [
-            {
-                "date": t.date.isoformat(),
-                "description": t.description,
-                "amount": t.amount,
-                "balance": t.balance,
-                "category": categorize(t.description),
-            }
-            for t in transactions
-        ],
+        "transactions": _transaction_records(df),
     }
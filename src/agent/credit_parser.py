@@ -1,11 +1,12 @@
 """Credit statement parser - extracts loan issuances, repayments, and debt structure."""
 import re
+from functools import partial
 from datetime import datetime
-from typing import List, Optional
+from typing import BinaryIO, List, Optional, Union
 
-import pdfplumber
 from dateutil import parser as date_parser
 
+from .extraction import _bare_amount, _map_pages, _merge_by_date, _signed_number
 from .models import CreditTransaction
 
 # Patterns to identify credit-related transactions
@@ -39,6 +40,19 @@ CREDIT_CARD_PATTERNS = [
     r"\bкарта\s*кредит\b",
 ]
 
+# Rows only need "any credit keyword" to qualify, so all four lists share one
+# alternation; loan-type classification keeps its per-category patterns.
+CREDIT_ANY_RE = re.compile(
+    "|".join(LOAN_ISSUANCE_PATTERNS + LOAN_REPAYMENT_PATTERNS + INSTALLMENT_PATTERNS + CREDIT_CARD_PATTERNS),
+    re.IGNORECASE,
+)
+INSTALLMENT_RE = re.compile("|".join(INSTALLMENT_PATTERNS), re.IGNORECASE)
+CREDIT_CARD_RE = re.compile("|".join(CREDIT_CARD_PATTERNS), re.IGNORECASE)
+BUSINESS_LOAN_RE = re.compile(r"\b(?:ип|бизнес|business)\b", re.IGNORECASE)
+
+DATE_LINE_RE = re.compile(r"\b(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})\b")
+AMOUNT_RE = re.compile(r"([-+]?)\s*(\d[\d\s,\.]*\d)")
+
 
 def _parse_date(text: str) -> Optional[datetime]:
     """Parse date string, ensuring result is within reasonable bounds (2000-2100)."""
@@ -55,144 +69,143 @@ def _parse_amount(text: str) -> Optional[float]:
     """Parse amount from text, handling KZT format with spaces and commas."""
     if not text:
         return None
+    # Fast path for bare amount cells ("-12 500,00")
+    parts = _bare_amount(text)
+    if parts is not None:
+        return _signed_number(*parts)
     # Match numbers with spaces/commas
-    match = re.search(r"([-+]?)\s*(\d[\d\s,\.]*\d)", text)
+    match = AMOUNT_RE.search(text)
     if not match:
         return None
-    sign = match.group(1) or ""
-    num_raw = match.group(2)
-    num_raw = num_raw.replace(" ", "")
-    if "," in num_raw and "." not in num_raw:
-        num_raw = num_raw.replace(",", ".")
-    else:
-        num_raw = num_raw.replace(",", "")
-    try:
-        value = float(num_raw)
-        return -value if sign == "-" else value
-    except ValueError:
-        return None
+    return _signed_number(match.group(1) or "", match.group(2))
 
 
 def _classify_loan_type(description: str) -> str:
-    """Classify loan type from description."""
-    desc_lower = description.lower()
+    """Classify loan type from description (patterns are case-insensitive)."""
+    if CREDIT_CARD_RE.search(description):
+        return "credit_card"
     
-    for pattern in CREDIT_CARD_PATTERNS:
-        if re.search(pattern, desc_lower, re.IGNORECASE):
-            return "credit_card"
+    if INSTALLMENT_RE.search(description):
+        return "installment"
     
-    for pattern in INSTALLMENT_PATTERNS:
-        if re.search(pattern, desc_lower, re.IGNORECASE):
-            return "installment"
-    
-    if re.search(r"\b(?:ип|бизнес|business)\b", desc_lower, re.IGNORECASE):
+    if BUSINESS_LOAN_RE.search(description):
         return "business_loan"
     
     return "cash_loan"  # default
 
 
-def extract_credit_transactions(pdf_path: str, max_pages: int = 30) -> List[CreditTransaction]:
+def _page_credit_transactions(page, use_tables: bool = True) -> List[CreditTransaction]:
+    """Credit-related transactions found on one pdfplumber page."""
+    credit_txns: List[CreditTransaction] = []
+    # Table detection (edge finding + clustering) is the expensive part of a page
+    tables = (page.extract_tables() or []) if use_tables else []
+    # Text lines are only a fallback for pages without tables (as in parser.py);
+    # scanning both would re-add every table row found again in the text
+    lines = (page.extract_text() or "").splitlines() if not tables else []
+    # Drop pdfminer's cached layout objects for this page (flush_cache
+    # plus textmap cache) so memory stays flat across long statements
+    page.close()
+    
+    # Process tables
+    for table in tables:
+        for row in table:
+            cells = [c.strip() if c else "" for c in row if c and c.strip()]
+            if not cells:
+                continue
+
+            # Cheapest filter first: most rows are not credit-related. Joined
+            # once; IGNORECASE patterns need no lower-cased copy.
+            description = " ".join(cells)
+            if not CREDIT_ANY_RE.search(description):
+                continue
+
+            # Find date
+            date_val = None
+            for cell in cells:
+                date_val = _parse_date(cell)
+                if date_val:
+                    break
+            if not date_val:
+                continue
+
+            # Find amount
+            amount_val = None
+            for cell in reversed(cells):
+                amount_val = _parse_amount(cell)
+                if amount_val is not None:
+                    break
+            if amount_val is None:
+                continue
+
+            loan_type = _classify_loan_type(description)
+            credit_txns.append(
+                CreditTransaction(
+                    date=date_val,
+                    description=description,
+                    amount=amount_val,
+                    loan_type=loan_type,
+                )
+            )
+
+    # Process text lines as fallback (empty when the page had tables)
+    for line in lines:
+        line_clean = " ".join(line.split())
+        if len(line_clean) < 10:
+            continue
+
+        # Cheapest filter first: most lines are not credit-related
+        if not CREDIT_ANY_RE.search(line_clean):
+            continue
+
+        date_match = DATE_LINE_RE.search(line_clean)
+        if not date_match:
+            continue
+
+        date_val = _parse_date(date_match.group(1))
+        if not date_val:
+            continue
+
+        amount_val = _parse_amount(line_clean[date_match.end():])
+        if amount_val is None:
+            continue
+
+        loan_type = _classify_loan_type(line_clean)
+        credit_txns.append(
+            CreditTransaction(
+                date=date_val,
+                description=line_clean,
+                amount=amount_val,
+                loan_type=loan_type,
+            )
+        )
+    
+    return credit_txns
+
+
+def extract_credit_transactions(
+    pdf_path: Union[str, BinaryIO],
+    max_pages: int = 30,
+    workers: int = 1,
+    use_tables: bool = True,
+) -> List[CreditTransaction]:
     """
-    Extract credit-related transactions from a credit statement PDF.
+    Extract credit-related transactions from a credit statement PDF (path or binary stream).
     
     Looks for:
     - Loan issuances (positive amounts with loan keywords)
     - Loan repayments (negative amounts with repayment keywords)
     - Installment purchases
     - Credit card transactions
-    """
-    credit_txns: List[CreditTransaction] = []
     
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-        pages_to_process = min(total_pages, max_pages)
-        
-        for page in pdf.pages:
-            tables = page.extract_tables() or []
-            text = page.extract_text() or ""
-            lines = text.splitlines()
-            
-            # Process tables
-            for table in tables:
-                for row in table:
-                    cells = [c.strip() if c else "" for c in row if c and c.strip()]
-                    if not cells:
-                        continue
-                    
-                    # Find date
-                    date_val = None
-                    for cell in cells:
-                        date_val = _parse_date(cell)
-                        if date_val:
-                            break
-                    if not date_val:
-                        continue
-                    
-                    # Find amount
-                    amount_val = None
-                    for cell in reversed(cells):
-                        amount_val = _parse_amount(cell)
-                        if amount_val is not None:
-                            break
-                    if amount_val is None:
-                        continue
-                    
-                    # Check if credit-related
-                    description = " ".join(cells).lower()
-                    is_loan_issuance = any(re.search(p, description, re.IGNORECASE) for p in LOAN_ISSUANCE_PATTERNS)
-                    is_repayment = any(re.search(p, description, re.IGNORECASE) for p in LOAN_REPAYMENT_PATTERNS)
-                    is_credit_related = is_loan_issuance or is_repayment or any(
-                        re.search(p, description, re.IGNORECASE) 
-                        for p in INSTALLMENT_PATTERNS + CREDIT_CARD_PATTERNS
-                    )
-                    
-                    if is_credit_related:
-                        loan_type = _classify_loan_type(" ".join(cells))
-                        credit_txns.append(
-                            CreditTransaction(
-                                date=date_val,
-                                description=" ".join(cells),
-                                amount=amount_val,
-                                loan_type=loan_type,
-                            )
-                        )
-            
-            # Process text lines as fallback
-            for line in lines:
-                line_clean = " ".join(line.split())
-                if len(line_clean) < 10:
-                    continue
-                
-                date_match = re.search(r"\b(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})\b", line_clean)
-                if not date_match:
-                    continue
-                
-                date_val = _parse_date(date_match.group(1))
-                if not date_val:
-                    continue
-                
-                amount_val = _parse_amount(line_clean[date_match.end():])
-                if amount_val is None:
-                    continue
-                
-                # Check if credit-related
-                is_loan_issuance = any(re.search(p, line_clean, re.IGNORECASE) for p in LOAN_ISSUANCE_PATTERNS)
-                is_repayment = any(re.search(p, line_clean, re.IGNORECASE) for p in LOAN_REPAYMENT_PATTERNS)
-                is_credit_related = is_loan_issuance or is_repayment or any(
-                    re.search(p, line_clean, re.IGNORECASE) 
-                    for p in INSTALLMENT_PATTERNS + CREDIT_CARD_PATTERNS
-                )
-                
-                if is_credit_related:
-                    loan_type = _classify_loan_type(line_clean)
-                    credit_txns.append(
-                        CreditTransaction(
-                            date=date_val,
-                            description=line_clean,
-                            amount=amount_val,
-                            loan_type=loan_type,
-                        )
-                    )
+    With ``workers > 1`` pages are parsed in a process pool; short statements
+    always stay in-process (see ``extraction._map_pages``). Pass
+    ``use_tables=False`` for text-only statements to skip table detection.
+    """
+    per_page = _map_pages(
+        pdf_path,
+        max_pages,
+        workers,
+        partial(_page_credit_transactions, use_tables=use_tables),
+    )
     
-    credit_txns.sort(key=lambda t: t.date)
-    return credit_txns
+    return _merge_by_date(per_page)
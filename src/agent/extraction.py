@@ -0,0 +1,130 @@
+"""Page handling and amount normalisation shared by the statement and credit PDF parsers."""
+import heapq
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from operator import attrgetter
+from typing import BinaryIO, Callable, List, Optional, Tuple, TypeVar, Union
+
+import pdfplumber
+
+T = TypeVar("T")
+
+# Below this many pages a process pool costs more to start than it saves
+_MIN_PARALLEL_PAGES = 4
+# Pages handed to a worker per task, to amortise IPC on long statements
+_PAGES_PER_TASK = 4
+_BY_DATE = attrgetter("date")
+
+_ASCII_DIGITS = frozenset("0123456789")
+_ASCII_AMOUNT_CHARS = frozenset("0123456789 ,.")
+_DROP_SPACES = str.maketrans("", "", " ")
+_COMMA_TO_DOT = str.maketrans(",", ".")
+
+
+def _page_worker(
+    page_fn: Callable[..., List[T]],
+    source: Union[str, bytes],
+    page_number: int,
+) -> List[T]:
+    """Process-pool entry point: run ``page_fn`` on a single 1-based page."""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with pdfplumber.open(source, pages=[page_number]) as pdf:
+        return page_fn(pdf.pages[0])
+
+
+def _map_pages(
+    pdf_path: Union[str, BinaryIO],
+    max_pages: int,
+    workers: int,
+    page_fn: Callable[..., List[T]],
+) -> List[List[T]]:
+    """
+    ``page_fn`` results for the first ``max_pages`` pages, in page order.
+
+    With ``workers > 1`` pages are parsed in a process pool (``page_fn`` must
+    then be picklable: a module-level function or a ``partial`` of one);
+    short documents (up to ``_MIN_PARALLEL_PAGES`` pages) always stay in-process.
+    """
+    per_page: List[List[T]] = []
+    with pdfplumber.open(pdf_path) as pdf:
+        pages_to_process = min(len(pdf.pages), max_pages)
+
+        parallel = workers > 1 and pages_to_process > _MIN_PARALLEL_PAGES
+        if not parallel:
+            for page in pdf.pages[:pages_to_process]:
+                per_page.append(page_fn(page))
+
+    if parallel:
+        # pdfplumber is pure Python, so threads would serialise on the GIL.
+        # Workers reopen the document themselves: pass the path, or the raw bytes of a stream
+        if isinstance(pdf_path, str):
+            source: Union[str, bytes] = pdf_path
+        else:
+            pdf_path.seek(0)
+            source = pdf_path.read()
+        with ProcessPoolExecutor(
+            max_workers=min(workers, pages_to_process),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            per_page = list(pool.map(
+                partial(_page_worker, page_fn, source),
+                range(1, pages_to_process + 1),
+                chunksize=_PAGES_PER_TASK,
+            ))
+    return per_page
+
+
+def _merge_by_date(per_page: List[List[T]]) -> List[T]:
+    """All page results as one list ordered by ``date``."""
+    # Pages are short and mostly chronological: sort each, then k-way merge.
+    # Both steps are stable, so equal dates keep page/row order.
+    for page_items in per_page:
+        page_items.sort(key=_BY_DATE)
+    return list(heapq.merge(*per_page, key=_BY_DATE))
+
+
+def _bare_amount(text: str) -> Optional[Tuple[str, str]]:
+    """(sign, number) when the cell is only a signed number like "-16 313,00", else None.
+
+    A character check stands in for the parsers' amount regexes on such
+    cells and yields the same sign and number text.
+    """
+    s = text.strip()
+    sign = s[:1] if s[:1] in ("-", "+") else ""
+    body = s[len(sign):].lstrip()
+    if (
+        len(body) >= 2
+        and body[0] in _ASCII_DIGITS
+        and body[-1] in _ASCII_DIGITS
+        and _ASCII_AMOUNT_CHARS.issuperset(body)
+    ):
+        return sign, body
+    return None
+
+
+def _number(num_raw: str) -> Optional[float]:
+    """Float value of a matched number body, or None."""
+    # Normalize spaces (used as thousands separators in KZT, e.g. "16 313,00")
+    num_raw = num_raw.translate(_DROP_SPACES)
+    # If we only have commas (no dot), treat last comma as decimal separator.
+    if "," in num_raw and "." not in num_raw:
+        # turn all commas into dots, float() will read decimal correctly
+        num_raw = num_raw.translate(_COMMA_TO_DOT)
+    else:
+        # Standard western format: remove thousands commas, keep decimal dot
+        num_raw = num_raw.replace(",", "")
+    try:
+        return float(num_raw)
+    except ValueError:
+        return None
+
+
+def _signed_number(sign: str, num_raw: str) -> Optional[float]:
+    """``_number`` negated for a "-" sign."""
+    value = _number(num_raw)
+    if value is None:
+        return None
+    return -value if sign == "-" else value
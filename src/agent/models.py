@@ -1,9 +1,12 @@
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 
-@dataclass
+
+@dataclass(slots=True)
 class Transaction:
     date: datetime
     description: str
@@ -11,7 +14,7 @@ class Transaction:
     balance: Optional[float] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class CreditTransaction:
     """Credit-specific transaction (loan issuance, repayment, etc.)"""
     date: datetime
@@ -21,7 +24,7 @@ class CreditTransaction:
     remaining_balance: Optional[float] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class QuestionnaireAnswers:
     """User onboarding questionnaire responses - MANDATORY declared financial data"""
     # Required financial numbers
@@ -40,13 +43,49 @@ class StatementSummary:
     transactions: List[Transaction] = field(default_factory=list)
     currency: str = "unknown"
 
+    # Derived values are cached on first access: build a new summary
+    # rather than mutating ``transactions`` afterwards.
+    @cached_property
+    def _columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Column arrays (dates, descriptions, amounts, balances) filled in one pass."""
+        size = len(self.transactions)
+        dates = np.empty(size, dtype="datetime64[ns]")
+        descriptions = np.empty(size, dtype=object)
+        amounts = np.empty(size, dtype=np.float64)
+        balances = np.full(size, np.nan)  # NaN marks a missing balance
+        for i, t in enumerate(self.transactions):
+            dates[i] = t.date
+            descriptions[i] = t.description
+            amounts[i] = t.amount
+            if t.balance is not None:
+                balances[i] = t.balance
+        return dates, descriptions, amounts, balances
+
     @property
-    def total_credit(self) -> float:
-        return sum(t.amount for t in self.transactions if t.amount > 0)
+    def dates(self) -> np.ndarray:
+        return self._columns[0]
 
     @property
+    def descriptions(self) -> np.ndarray:
+        return self._columns[1]
+
+    @property
+    def amounts(self) -> np.ndarray:
+        return self._columns[2]
+
+    @property
+    def balances(self) -> np.ndarray:
+        return self._columns[3]
+
+    @cached_property
+    def total_credit(self) -> float:
+        a = self.amounts
+        return float(a[a > 0].sum())
+
+    @cached_property
     def total_debit(self) -> float:
-        return sum(-t.amount for t in self.transactions if t.amount < 0)
+        a = self.amounts
+        return float(-a[a < 0].sum())
 
     @property
     def closing_balance(self) -> Optional[float]:
@@ -1,23 +1,57 @@
-import gc
 import re
+import sys
 from datetime import datetime
-from typing import Iterable, List, Optional, Tuple
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-import pdfplumber
 from dateutil import parser as date_parser
 
+from .extraction import _bare_amount, _map_pages, _merge_by_date, _number, _signed_number
 from .models import StatementSummary, Transaction
 
 DATE_REGEX = re.compile(r"\b(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})\b")
+# Day-first numeric dates with a four-digit year and one consistent separator.
+# Two-digit years are left to dateutil, whose century window differs from strptime's.
+NUMERIC_DATE_REGEX = re.compile(r"(?P<d>[0-9]{1,2})(?P<sep>[./-])(?P<m>[0-9]{1,2})(?P=sep)(?P<y>[0-9]{4})")
 # Allow digits with spaces/commas for thousands and comma/dot for decimals.
+# Possessive runs (Python 3.11+) never backtrack, so junk cells with long
+# whitespace/separator runs scan in linear time; matches are unchanged.
 AMOUNT_REGEX = re.compile(
-    r"(?P<sign>[-+])?\(?\s*(?P<num>\d[\d\s,\.]*\d)\s*\)?\s*(?P<tag>CR|DR)?",
+    r"(?P<sign>[-+])?\(?\s*+(?P<num>\d(?:[\s,\.]*+\d)+)\s*+\)?\s*+(?P<tag>CR|DR)?",
     re.IGNORECASE,
 )
+_ANY_DIGIT = re.compile(r"\d")
+
+# Kaspi table headers, matched by prefix on the lower-cased header cell
+_KASPI_HEADER_FIELDS = (
+    ("date", ("дата",)),
+    ("amount", ("сумма",)),
+    ("balance", ("остаток",)),
+    ("description", ("операция", "детали", "описание")),
+)
+
+
+# Only fully specified numeric dates are memoised: dateutil fills missing
+# fields (e.g. the year of "15.03") from today, which a process-wide cache
+# would freeze for the life of the server.
+@lru_cache(maxsize=4096)
+def _numeric_date(text: str) -> Optional[datetime]:
+    """Plain dd.mm.yyyy / dd/mm/yyyy / dd-mm-yyyy cell as a datetime, else None."""
+    m = NUMERIC_DATE_REGEX.fullmatch(text)
+    if not m:
+        return None
+    try:
+        return datetime(int(m.group("y")), int(m.group("m")), int(m.group("d")))
+    except ValueError:
+        return None
 
 
 def _parse_date(text: str) -> Optional[datetime]:
     """Parse date string, ensuring result is within reasonable bounds (2000-2100)."""
+    # Fast path: build the datetime directly (same result as dateutil with dayfirst=True)
+    dt = _numeric_date(text)
+    if dt is not None:
+        return dt if 2000 <= dt.year <= 2100 else None
     try:
         dt = date_parser.parse(text, dayfirst=True, yearfirst=False, fuzzy=True)
         # Validate: year must be between 2000 and 2100 (reject misparsed dates like 3505)
@@ -28,31 +62,29 @@ def _parse_date(text: str) -> Optional[datetime]:
         return None
 
 
+@lru_cache(maxsize=4096)
 def _parse_amount(text: str) -> Optional[float]:
     if not text:
         return None
+    # Fast path for bare amount cells ("-16 313,00")
+    parts = _bare_amount(text)
+    if parts is not None:
+        return _signed_number(*parts)
+
+    s = text.strip()
+    # Cells without a digit cannot hold an amount: skip the full pattern
+    if not _ANY_DIGIT.search(s):
+        return None
     match = AMOUNT_REGEX.search(text)
     if not match:
         return None
-    num_raw = match.group("num")
-    # Normalize spaces (used as thousands separators in KZT, e.g. "16 313,00")
-    num_raw = num_raw.replace(" ", "")
-    # If we only have commas (no dot), treat last comma as decimal separator.
-    if "," in num_raw and "." not in num_raw:
-        num_raw = num_raw.replace(".", "")
-        # turn all commas into dots, float() will read decimal correctly
-        num_raw = num_raw.replace(",", ".")
-    else:
-        # Standard western format: remove thousands commas, keep decimal dot
-        num_raw = num_raw.replace(",", "")
-    try:
-        value = float(num_raw)
-    except ValueError:
+    value = _number(match.group("num"))
+    if value is None:
         return None
 
     sign = match.group("sign") or ""
     tag = (match.group("tag") or "").upper()
-    negative = "-" in sign or text.strip().startswith("(") or tag == "DR"
+    negative = "-" in sign or s.startswith("(") or tag == "DR"
     if tag == "CR":
         negative = False
     return -value if negative else value
@@ -64,30 +96,33 @@ def _extract_table_transactions(rows: Iterable[Iterable[str]]) -> List[Transacti
         cells = [c.strip() for c in row if c and c.strip()]
         if not cells:
             continue
-        date_candidate = None
-        for cell in cells:
-            date_candidate = _parse_date(cell)
-            if date_candidate:
-                break
+        # Parse every cell once; the results drive date, amounts and description
+        dates = [_parse_date(c) for c in cells]
+        date_candidate = next((d for d in dates if d), None)
         if not date_candidate:
             continue
 
+        amounts = [_parse_amount(c) for c in cells]
+        # One right-to-left walk: the rightmost amount is the transaction
+        # amount, the next one to its left the balance; stop once both are found
         amount_candidate: Optional[float] = None
         balance_candidate: Optional[float] = None
-        for cell in reversed(cells):
-            amt = _parse_amount(cell)
-            if amt is not None and amount_candidate is None:
-                amount_candidate = amt
+        for a in reversed(amounts):
+            if a is None:
                 continue
-            if amt is not None and balance_candidate is None:
-                balance_candidate = amt
+            if amount_candidate is None:
+                amount_candidate = a
+            else:
+                balance_candidate = a
+                break
         if amount_candidate is None:
             continue
 
         description_parts = [
-            c for c in cells if _parse_date(c) is None and _parse_amount(c) is None
+            c for c, d, a in zip(cells, dates, amounts) if d is None and a is None
         ]
-        description = " ".join(description_parts).strip() or "N/A"
+        # Statements repeat a few dozen descriptions: keep one string object each
+        description = sys.intern(" ".join(description_parts).strip() or "N/A")
         transactions.append(
             Transaction(
                 date=date_candidate,
@@ -99,9 +134,74 @@ def _extract_table_transactions(rows: Iterable[Iterable[str]]) -> List[Transacti
     return transactions
 
 
-def _extract_text_transactions(lines: Iterable[str]) -> List[Transaction]:
+def _kaspi_columns(header: Sequence[Optional[str]]) -> Optional[Dict[str, List[int]]]:
+    """Column positions by field for a Kaspi header row, or None if it is not one."""
+    columns: Dict[str, List[int]] = {}
+    for i, cell in enumerate(header):
+        name = (cell or "").strip().lower()
+        for field_name, prefixes in _KASPI_HEADER_FIELDS:
+            if name.startswith(prefixes):
+                columns.setdefault(field_name, []).append(i)
+                break
+    if "date" not in columns or "amount" not in columns:
+        return None
+    return columns
+
+
+def _extract_kaspi_table(
+    rows: Iterable[Sequence[Optional[str]]],
+    columns: Dict[str, List[int]],
+) -> List[Transaction]:
+    """Rows of a table with a known header: read each field from its own column."""
     transactions: List[Transaction] = []
-    for line in lines:
+    date_col = columns["date"][0]
+    amount_col = columns["amount"][0]
+    balance_col = columns["balance"][0] if "balance" in columns else None
+    desc_cols = columns.get("description", [])
+    width = max(i for cols in columns.values() for i in cols) + 1
+    for row in rows:
+        cells = [(c or "").strip() for c in row]
+        if len(cells) < width:
+            cells.extend([""] * (width - len(cells)))
+        date_val = _parse_date(cells[date_col]) if cells[date_col] else None
+        if not date_val:
+            continue
+        amount_val = _parse_amount(cells[amount_col])
+        if amount_val is None:
+            continue
+        balance_val = _parse_amount(cells[balance_col]) if balance_col is not None else None
+        description = sys.intern(" ".join(cells[i] for i in desc_cols if cells[i]) or "N/A")
+        transactions.append(
+            Transaction(
+                date=date_val,
+                description=description,
+                amount=amount_val,
+                balance=balance_val,
+            )
+        )
+    return transactions
+
+
+def _extract_table(rows: List[List[Optional[str]]]) -> List[Transaction]:
+    """Use the header's column layout when it is a Kaspi one, else scan every cell."""
+    columns = _kaspi_columns(rows[0]) if rows else None
+    if columns is not None:
+        return _extract_kaspi_table(rows[1:], columns)
+    return _extract_table_transactions(rows)
+
+
+def _extract_text_transactions(page_text: str) -> List[Transaction]:
+    transactions: List[Transaction] = []
+    # One scan over the whole page finds the lines worth looking at; lines
+    # without a date (most of them) are never split or searched on their own
+    line_start = -1
+    for m in DATE_REGEX.finditer(page_text):
+        start = page_text.rfind("\n", 0, m.start()) + 1
+        if start == line_start:
+            continue  # a later date on a line already handled
+        line_start = start
+        end = page_text.find("\n", m.end())
+        line = page_text[start:] if end < 0 else page_text[start:end]
         line_clean = " ".join(line.split())
         if len(line_clean) < 10:
             continue
@@ -115,18 +215,23 @@ def _extract_text_transactions(lines: Iterable[str]) -> List[Transaction]:
 
         trailing = line_clean[date_match.end() :].strip()
         amount_val = _parse_amount(trailing)
-        if amount_val is None:
+        if amount_val is not None:
+            # Same match _parse_amount used; the whole text for a bare number
+            match = AMOUNT_REGEX.search(trailing)
+            start, end = match.span() if match else (0, len(trailing))
+        else:
             # try last token
             tokens = trailing.split()
-            if tokens:
-                amount_val = _parse_amount(tokens[-1])
-        if amount_val is None:
-            continue
+            if not tokens:
+                continue
+            amount_val = _parse_amount(tokens[-1])
+            if amount_val is None:
+                continue
+            start, end = len(trailing) - len(tokens[-1]), len(trailing)
 
-        desc = trailing
-        if desc.endswith(tokens[-1]) and amount_val is not None and tokens:
-            desc = " ".join(tokens[:-1])
-        desc = desc.strip() or "N/A"
+        # Cut out exactly the amount text, so "12 000" leaves no "12" behind
+        desc = " ".join((trailing[:start] + " " + trailing[end:]).split())
+        desc = sys.intern(desc or "N/A")
 
         transactions.append(
             Transaction(
@@ -139,41 +244,42 @@ def _extract_text_transactions(lines: Iterable[str]) -> List[Transaction]:
     return transactions
 
 
-def extract_transactions(pdf_path: str, max_pages: int = 100) -> List[Transaction]:
+def _page_transactions(page) -> List[Transaction]:
+    """Transactions found on one pdfplumber page."""
+    transactions: List[Transaction] = []
+    # Process tables first (more reliable for Kaspi)
+    tables = page.extract_tables() or []
+    for table in tables:
+        transactions.extend(_extract_table(table))
+
+    # Fallback to text extraction if no tables
+    if not tables:
+        transactions.extend(_extract_text_transactions(page.extract_text() or ""))
+    # pdf.pages keeps every Page alive, so `del page` frees nothing: drop its
+    # cached layout objects instead. Memory stays flat without gc.collect(),
+    # which would walk every Transaction built so far on each call.
+    page.close()
+    return transactions
+
+
+def extract_transactions(
+    pdf_path: Union[str, BinaryIO],
+    max_pages: int = 100,
+    workers: int = 1,
+) -> List[Transaction]:
     """Parse transactions from a PDF bank statement.
     
     Args:
-        pdf_path: Path to PDF file
+        pdf_path: Path to PDF file, or a binary file-like object with its bytes
         max_pages: Maximum number of pages to process (to limit memory usage)
+        workers: Parse pages in a process pool of this size when > 1; short
+            statements stay in-process (see ``extraction._map_pages``)
     """
-    transactions: List[Transaction] = []
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-        pages_to_process = min(total_pages, max_pages)
-        
-        for i, page in enumerate(pdf.pages[:pages_to_process]):
-            # Process tables first (more reliable for Kaspi)
-            tables = page.extract_tables() or []
-            for table in tables:
-                transactions.extend(_extract_table_transactions(table))
-
-            # Fallback to text extraction if no tables
-            if not tables:
-                text = page.extract_text() or ""
-                lines = text.splitlines()
-                transactions.extend(_extract_text_transactions(lines))
-            
-            # Explicit cleanup after each page to free memory
-            del tables
-            del page
-            # Force GC every 5 pages to be more aggressive
-            if (i + 1) % 5 == 0:
-                gc.collect()
-
-    transactions.sort(key=lambda t: t.date)
-    return transactions
+    per_page = _map_pages(pdf_path, max_pages, workers, _page_transactions)
+
+    return _merge_by_date(per_page)
 
 
-def analyze_statement(pdf_path: str, currency: str = "unknown") -> StatementSummary:
-    txns = extract_transactions(pdf_path)
+def analyze_statement(pdf_path: str, currency: str = "unknown", workers: int = 1) -> StatementSummary:
+    txns = extract_transactions(pdf_path, workers=workers)
     return StatementSummary(transactions=txns, currency=currency)
@@ -1,22 +1,30 @@
 """Financial reality analysis - comparing declared vs detected values."""
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, List, Sequence, Union
 
-from .analytics import _to_df, categorize
-from .models import QuestionnaireAnswers, Transaction
+import numpy as np
+import pandas as pd
+
+from .analytics import _months_in_period, _to_df, categorize
+from .models import QuestionnaireAnswers, StatementSummary, Transaction
 
 
 def compare_declared_vs_detected(
-    transactions: List[Transaction],
+    transactions: Union[List[Transaction], StatementSummary, pd.DataFrame],
     questionnaire: QuestionnaireAnswers,
 ) -> Dict[str, Any]:
     """
     Compare user-declared financial data with what transactions actually show.
     
+    ``transactions`` may already be the frame from ``_to_df``, so callers
+    that built it once do not pay for it again; a ``StatementSummary`` is
+    converted from its column arrays.
+    
     Returns discrepancies and warnings.
     """
-    df = _to_df(transactions)
+    df = transactions if isinstance(transactions, pd.DataFrame) else _to_df(transactions)
     if df.empty:
         return {
             "income_comparison": {},
@@ -25,17 +33,11 @@ def compare_declared_vs_detected(
             "warnings": [],
         }
     
-    # Calculate detected values from transactions
-    income_txns = df[df["amount"] > 0]
-    detected_monthly_income = float(income_txns["amount"].sum()) if not income_txns.empty else 0.0
-    
-    # Approximate months in period (simplified - assume 1 month if we can't determine)
-    months_in_period = 1.0  # TODO: Calculate from date range
-    detected_monthly_income = detected_monthly_income / months_in_period
-    
-    expense_txns = df[df["amount"] < 0]
-    detected_monthly_expenses = float((-expense_txns["amount"]).sum()) if not expense_txns.empty else 0.0
-    detected_monthly_expenses = detected_monthly_expenses / months_in_period
+    # Calculate detected values from transactions: income/spend are the
+    # sign-split amount columns, so no filtered copies are needed
+    months_in_period = _months_in_period(df)
+    detected_monthly_income = float(df["income"].to_numpy().sum()) / months_in_period
+    detected_monthly_expenses = float(df["spend"].to_numpy().sum()) / months_in_period
     
     # Compare declared vs detected
     declared_income = questionnaire.monthly_income
@@ -100,20 +102,73 @@ def compare_declared_vs_detected(
     }
 
 
-def build_financial_reality_summary(
+# Detected/declared ratios outside [_UNDER_RATIO, _OVER_RATIO] are interpreted
+_UNDER_RATIO, _OVER_RATIO = 0.8, 1.2
+# Debt load in months of declared income
+_DEBT_CRITICAL_MONTHS, _DEBT_WARNING_MONTHS = 12, 6
+
+_INCOME_ABOVE = MappingProxyType({
+    "category": "income",
+    "message": "Ваш фактический доход выше заявленного. Возможно, вы не учитываете все источники дохода, или часть дохода — это кредитные поступления.",
+    "severity": "info",
+})
+_INCOME_BELOW = MappingProxyType({
+    "category": "income",
+    "message": "Ваш фактический доход ниже заявленного. Возможно, часть дохода проходит через другие счета, или доход нестабилен.",
+    "severity": "warning",
+})
+_EXPENSES_ABOVE = MappingProxyType({
+    "category": "expenses",
+    "message": "Вы тратите больше, чем думаете. Это серьезная проблема — недооценка расходов ведет к долгам и финансовым проблемам.",
+    "severity": "critical",
+})
+_EXPENSES_BELOW = MappingProxyType({
+    "category": "expenses",
+    "message": "Ваши фактические расходы ниже заявленных. Возможно, часть расходов проходит через другие счета или карты.",
+    "severity": "info",
+})
+_REFINANCING = MappingProxyType({
+    "category": "credit_behavior",
+    "message": "Обнаружены признаки рефинансирования: вы берете новые кредиты для погашения старых. Это опасная практика.",
+    "severity": "critical",
+})
+_SPIRAL_RISK = MappingProxyType({
+    "category": "credit_behavior",
+    "message": "Ваше кредитное поведение указывает на высокий риск кредитной спирали. Частые новые кредиты — это красный флаг.",
+    "severity": "critical",
+})
+# Indexed by band: 1 = above, -1 = below
+_INCOME_NOTES = {1: _INCOME_ABOVE, -1: _INCOME_BELOW}
+_EXPENSE_NOTES = {1: _EXPENSES_ABOVE, -1: _EXPENSES_BELOW}
+
+
+def _band(detected: float, declared: float) -> int:
+    """1 when detected is well above declared, -1 when well below, else 0."""
+    if detected > declared * _OVER_RATIO:
+        return 1
+    if detected < declared * _UNDER_RATIO:
+        return -1
+    return 0
+
+
+def _debt_ratio(questionnaire: QuestionnaireAnswers) -> float:
+    """Outstanding debt in months of declared income (0 when unknown)."""
+    if not questionnaire.total_outstanding_debt or questionnaire.monthly_income <= 0:
+        return 0.0
+    return questionnaire.total_outstanding_debt / questionnaire.monthly_income
+
+
+def _reality_summary(
     questionnaire: QuestionnaireAnswers,
     detected_income: float,
     detected_expenses: float,
     credit_behavior: Dict[str, Any],
     discrepancies: List[Dict[str, Any]],
+    income_band: int,
+    expense_band: int,
+    debt_to_income_ratio: float,
 ) -> Dict[str, Any]:
-    """
-    Build the Financial Reality Summary with three sections:
-    1. What you think your situation is (declared)
-    2. What transactions show (detected)
-    3. What this means (advisor interpretation)
-    """
-    
+    """Assemble the three summary sections from precomputed comparison flags."""
     # Section 1: What user thinks
     user_view = {
         "monthly_income": questionnaire.monthly_income,
@@ -139,69 +194,100 @@ def build_financial_reality_summary(
     
     # Section 3: What this means (interpretation)
     interpretation = []
-    
-    # Income interpretation
-    if detected_income > questionnaire.monthly_income * 1.2:
-        interpretation.append({
-            "category": "income",
-            "message": "Ваш фактический доход выше заявленного. Возможно, вы не учитываете все источники дохода, или часть дохода — это кредитные поступления.",
-            "severity": "info",
-        })
-    elif detected_income < questionnaire.monthly_income * 0.8:
-        interpretation.append({
-            "category": "income",
-            "message": "Ваш фактический доход ниже заявленного. Возможно, часть дохода проходит через другие счета, или доход нестабилен.",
-            "severity": "warning",
-        })
-    
-    # Expense interpretation
-    if detected_expenses > questionnaire.monthly_living_expenses * 1.2:
-        interpretation.append({
-            "category": "expenses",
-            "message": "Вы тратите больше, чем думаете. Это серьезная проблема — недооценка расходов ведет к долгам и финансовым проблемам.",
-            "severity": "critical",
-        })
-    elif detected_expenses < questionnaire.monthly_living_expenses * 0.8:
-        interpretation.append({
-            "category": "expenses",
-            "message": "Ваши фактические расходы ниже заявленных. Возможно, часть расходов проходит через другие счета или карты.",
-            "severity": "info",
-        })
+    if income_band:
+        interpretation.append(dict(_INCOME_NOTES[income_band]))
+    if expense_band:
+        interpretation.append(dict(_EXPENSE_NOTES[expense_band]))
     
     # Credit behavior interpretation
     if credit_behavior.get("refinancing_detected", False):
+        interpretation.append(dict(_REFINANCING))
+    if credit_behavior.get("credit_spiral_risk") in ["high", "medium"]:
+        interpretation.append(dict(_SPIRAL_RISK))
+    
+    # Debt load interpretation
+    if debt_to_income_ratio > _DEBT_CRITICAL_MONTHS:  # More than 1 year of income
         interpretation.append({
-            "category": "credit_behavior",
-            "message": "Обнаружены признаки рефинансирования: вы берете новые кредиты для погашения старых. Это опасная практика.",
+            "category": "debt_load",
+            "message": f"Ваш долг составляет {debt_to_income_ratio:.1f} месячных доходов. Это критически высокий уровень долговой нагрузки.",
             "severity": "critical",
         })
-    
-    if credit_behavior.get("credit_spiral_risk") in ["high", "medium"]:
+    elif debt_to_income_ratio > _DEBT_WARNING_MONTHS:
         interpretation.append({
-            "category": "credit_behavior",
-            "message": "Ваше кредитное поведение указывает на высокий риск кредитной спирали. Частые новые кредиты — это красный флаг.",
-            "severity": "critical",
+            "category": "debt_load",
+            "message": f"Ваш долг составляет {debt_to_income_ratio:.1f} месячных доходов. Это высокий уровень долговой нагрузки.",
+            "severity": "warning",
         })
     
-    # Debt load interpretation
-    if questionnaire.total_outstanding_debt:
-        debt_to_income_ratio = (questionnaire.total_outstanding_debt / questionnaire.monthly_income) if questionnaire.monthly_income > 0 else 0
-        if debt_to_income_ratio > 12:  # More than 1 year of income
-            interpretation.append({
-                "category": "debt_load",
-                "message": f"Ваш долг составляет {debt_to_income_ratio:.1f} месячных доходов. Это критически высокий уровень долговой нагрузки.",
-                "severity": "critical",
-            })
-        elif debt_to_income_ratio > 6:
-            interpretation.append({
-                "category": "debt_load",
-                "message": f"Ваш долг составляет {debt_to_income_ratio:.1f} месячных доходов. Это высокий уровень долговой нагрузки.",
-                "severity": "warning",
-            })
-    
     return {
         "what_you_think": user_view,
         "what_transactions_show": detected_view,
         "what_this_means": interpretation,
         "discrepancies": discrepancies,
     }
+
+
+def build_financial_reality_summary(
+    questionnaire: QuestionnaireAnswers,
+    detected_income: float,
+    detected_expenses: float,
+    credit_behavior: Dict[str, Any],
+    discrepancies: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Build the Financial Reality Summary with three sections:
+    1. What you think your situation is (declared)
+    2. What transactions show (detected)
+    3. What this means (advisor interpretation)
+    """
+    return _reality_summary(
+        questionnaire,
+        detected_income,
+        detected_expenses,
+        credit_behavior,
+        discrepancies,
+        _band(detected_income, questionnaire.monthly_income),
+        _band(detected_expenses, questionnaire.monthly_living_expenses),
+        _debt_ratio(questionnaire),
+    )
+
+
+def build_financial_reality_summary_batch(
+    questionnaires: Sequence[QuestionnaireAnswers],
+    detected_incomes: Sequence[float],
+    detected_expenses: Sequence[float],
+    credit_behaviors: Sequence[Dict[str, Any]],
+    discrepancies: Sequence[List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """
+    ``build_financial_reality_summary`` for many users at once.
+    
+    The income/expense bands and debt ratios are computed as whole-array
+    comparisons; only the per-user dicts are built in Python.
+    """
+    n = len(questionnaires)
+    incomes = np.asarray(detected_incomes, dtype=np.float64)
+    expenses = np.asarray(detected_expenses, dtype=np.float64)
+    declared_incomes = np.fromiter((q.monthly_income for q in questionnaires), dtype=np.float64, count=n)
+    declared_expenses = np.fromiter((q.monthly_living_expenses for q in questionnaires), dtype=np.float64, count=n)
+    debts = np.fromiter((q.total_outstanding_debt or 0.0 for q in questionnaires), dtype=np.float64, count=n)
+
+    def bands(detected: np.ndarray, declared: np.ndarray) -> List[int]:
+        over = detected > declared * _OVER_RATIO
+        under = ~over & (detected < declared * _UNDER_RATIO)
+        return (over.astype(np.int8) - under.astype(np.int8)).tolist()
+
+    debt_ratios = np.divide(debts, declared_incomes, out=np.zeros(n), where=declared_incomes > 0).tolist()
+    return [
+        _reality_summary(q, inc, exp, cb, disc, ib, eb, dr)
+        for q, inc, exp, cb, disc, ib, eb, dr in zip(
+            questionnaires,
+            incomes.tolist(),
+            expenses.tolist(),
+            credit_behaviors,
+            discrepancies,
+            bands(incomes, declared_incomes),
+            bands(expenses, declared_expenses),
+            debt_ratios,
+        )
+    ]
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from agent.parser import _extract_text_transactions
+
+
+def test_text_description_drops_thousands_separated_amount():
+    txns = _extract_text_transactions(
+        "15.02.2024 Kaspi перевод 12 000\n"
+        "01.03.2024 Покупка Magnum -5 000,00\n"
+    )
+    assert [(t.date, t.description, t.amount) for t in txns] == [
+        (datetime(2024, 2, 15), "Kaspi перевод", 12000.0),
+        (datetime(2024, 3, 1), "Покупка Magnum", -5000.0),
+    ]
+
+
+def test_text_description_same_for_different_amounts():
+    txns = _extract_text_transactions(
+        "01.03.2024 Покупка Magnum -5 000,00\n"
+        "02.03.2024 Покупка Magnum -750,50\n"
+    )
+    assert {t.description for t in txns} == {"Покупка Magnum"}
+
+
+def test_text_amount_from_last_token_is_cut_from_description():
+    txns = _extract_text_transactions("13.01.2024 x 01.02.2024 Перевод 700")
+    assert [(t.description, t.amount) for t in txns] == [("x 01.02.2024 Перевод", 700.0)]